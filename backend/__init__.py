@@ -1 +1,14 @@
-from .logic import verify_resources, machine, process_payment
+from .logic import (verify_resources, machine, process_payment, pay_order, CoffeeMachine,
+                    reserve_drink, confirm_order, hold_active, cancel_order, release_expired_holds, brew_drink,
+                    available_drinks, exact_change_only, configure_machine, configure_menu, attach_shared_state,
+                    enable_journal, enable_analytics, enable_refill_scheduler, enable_order_queue)
+from .inventory import Inventory, Reservation
+from .reservations import HoldBook
+from .cash_box import CashBox
+from .shared_state import SharedMachineState
+from .menu import CompiledMenu, load_menu
+from .journal import Journal
+from .analytics import SalesAnalytics
+from .refill_scheduler import RefillScheduler
+from .hardware import SimulatedDriver, simulate_orders, throughput_report
+from .order_queue import OrderQueue, Barista
\ No newline at end of file
@@ -0,0 +1,233 @@
+import csv
+import io
+import time
+from array import array
+
+from .money import coins_value, to_cents
+from .journal import read_journal
+
+# Rolling windows kept by default: name -> (span, bucket size) in seconds
+DEFAULT_WINDOWS = {
+    "last_5_min": (300, 10),
+    "last_hour": (3600, 60),
+    "last_day": (86400, 900),
+}
+
+
+class RollingWindow:
+    """
+    Sums over the last 'span' seconds, kept in a ring of fixed-size time
+    buckets. add() is O(1); totals() looks at a fixed number of buckets,
+    however many orders went into them.
+    """
+
+    def __init__(self, span, bucket_size, fields):
+        self.span = span
+        self.bucket_size = bucket_size
+        self.fields = list(fields)
+        self.size = -(-span // bucket_size)
+        self._ids = [None] * self.size                      # which time bucket each slot holds
+        self._sums = [[0] * len(self.fields) for _ in range(self.size)]
+
+    def add(self, timestamp, values):
+        bucket_id = int(timestamp // self.bucket_size)
+        slot = bucket_id % self.size
+        sums = self._sums[slot]
+        if self._ids[slot] != bucket_id:
+            # The slot still holds a bucket that fell out of the window
+            self._ids[slot] = bucket_id
+            for i in range(len(sums)):
+                sums[i] = 0
+        for i, value in enumerate(values):
+            sums[i] += value
+
+    def add_field(self, timestamp, index, value):
+        """Adds to one field only (revenue, which arrives with the payment)."""
+        values = [0] * len(self.fields)
+        values[index] = value
+        self.add(timestamp, values)
+
+    def totals(self, now=None):
+        now = time.time() if now is None else now
+        newest = int(now // self.bucket_size)
+        oldest = newest - self.size + 1
+        result = [0] * len(self.fields)
+        for bucket_id, sums in zip(self._ids, self._sums):
+            if bucket_id is not None and oldest <= bucket_id <= newest:
+                for i, value in enumerate(sums):
+                    result[i] += value
+        return dict(zip(self.fields, result))
+
+
+class SalesAnalytics:
+    """
+    Incremental sales statistics for one CoffeeMachine.
+
+    Subscribe it to the machine (or use enable_analytics()) and every
+    "order" and "payment" event updates the counters in O(1): per-drink
+    counts and revenue, 24 hour-of-day buckets, rolling windows and
+    ingredient burn. summary() never goes back over the history.
+
+    Each served drink is also appended to compact columns (time, drink
+    id, price), which columns() / csv_chunks() export for offline work.
+    """
+
+    def __init__(self, menu, windows=None, clock=time.time):
+        self.clock = clock
+        self.drink_names = list(menu)
+        self.drink_ids = {name: index for index, name in enumerate(self.drink_names)}
+        self.prices = [to_cents(menu[name]["cost"]) for name in self.drink_names]
+        self.ingredient_names = []
+        for drink in menu.values():
+            for item in drink["ingredients"]:
+                if item not in self.ingredient_names:
+                    self.ingredient_names.append(item)
+        self.ingredient_ids = {name: index for index, name in enumerate(self.ingredient_names)}
+
+        # Totals since the analytics were started
+        self.orders = 0
+        self.payments = 0
+        self.revenue_cents = 0
+        self.change_cents = 0
+        self.refills = 0
+        self.drink_counts = [0] * len(self.drink_names)
+        self.drink_revenue = [0] * len(self.drink_names)
+        self.ingredient_used = [0] * len(self.ingredient_names)
+
+        # Hour of day (local time) -> orders / revenue, for peak hours
+        self.hourly_orders = [0] * 24
+        self.hourly_revenue = [0] * 24
+
+        windows = DEFAULT_WINDOWS if windows is None else windows
+        fields = ["orders", "revenue_cents"] + self.ingredient_names
+        self.windows = {name: RollingWindow(span, bucket, fields) for name, (span, bucket) in windows.items()}
+
+        # One entry per served drink, stored as typed arrays (8 + 2 + 8 bytes)
+        self.times = array("d")
+        self.drink_column = array("H")
+        self.price_column = array("q")
+
+        self._first_time = None
+
+    def __call__(self, event_type, data):
+        self.record(event_type, data, self.clock())
+
+    def record(self, event_type, data, timestamp):
+        if self._first_time is None:
+            self._first_time = timestamp
+        if event_type == "order":
+            self._record_order(data, timestamp)
+        elif event_type == "payment":
+            self.payments += 1
+            self.revenue_cents += data["cost"]
+            # Revenue is booked when money comes in, so windows see it then
+            hour = time.localtime(timestamp).tm_hour
+            self.hourly_revenue[hour] += data["cost"]
+            for window in self.windows.values():
+                window.add_field(timestamp, 1, data["cost"])
+            self.change_cents += coins_value(data["change"])
+        elif event_type == "refill":
+            self.refills += 1
+
+    def _record_order(self, data, timestamp):
+        drink_id = self.drink_ids.get(data["drink"])
+        if drink_id is None:
+            return  # a drink that was not on the menu we were built with
+        price = self.prices[drink_id]
+        self.orders += 1
+        self.drink_counts[drink_id] += 1
+        self.drink_revenue[drink_id] += price
+        self.hourly_orders[time.localtime(timestamp).tm_hour] += 1
+
+        # orders, revenue (booked by the payment event), then ingredients
+        values = [1, 0] + [0] * len(self.ingredient_names)
+        for item, amount in data["ingredients"].items():
+            index = self.ingredient_ids.get(item)
+            if index is not None:
+                self.ingredient_used[index] += amount
+                values[2 + index] = amount
+        for window in self.windows.values():
+            window.add(timestamp, values)
+
+        self.times.append(timestamp)
+        self.drink_column.append(drink_id)
+        self.price_column.append(price)
+
+    # --- Dashboard queries (no history scans) ---
+
+    def peak_hours(self, top=3):
+        """The busiest hours of the day as [(hour, orders), ...]."""
+        ranked = sorted(range(24), key=lambda hour: self.hourly_orders[hour], reverse=True)
+        return [(hour, self.hourly_orders[hour]) for hour in ranked[:top] if self.hourly_orders[hour]]
+
+    def burn_rates(self, window="last_hour", now=None):
+        """Ingredient units used per hour over a rolling window."""
+        now = self.clock() if now is None else now
+        rolling = self.windows[window]
+        totals = rolling.totals(now)
+        # Do not divide by the whole window while it is still filling up
+        span = rolling.span
+        if self._first_time is not None:
+            span = min(span, max(now - self._first_time, rolling.bucket_size))
+        return {item: round(totals[item] * 3600 / span, 2) for item in self.ingredient_names}
+
+    def summary(self, now=None):
+        now = self.clock() if now is None else now
+        return {
+            "orders": self.orders,
+            "payments": self.payments,
+            "refills": self.refills,
+            "revenue": self.revenue_cents / 100,
+            "change_given": self.change_cents / 100,
+            "drinks": {
+                name: {"count": self.drink_counts[i], "revenue": self.drink_revenue[i] / 100}
+                for i, name in enumerate(self.drink_names)
+            },
+            "ingredients_used": dict(zip(self.ingredient_names, self.ingredient_used)),
+            "peak_hours": self.peak_hours(),
+            "windows": {name: window.totals(now) for name, window in self.windows.items()},
+            "burn_per_hour": self.burn_rates(now=now) if "last_hour" in self.windows else None,
+        }
+
+    # --- Export ---
+
+    def columns(self):
+        """
+        The served drinks as NumPy arrays ('time', 'drink_id', 'price_cents').
+        The arrays are copies, so later orders do not change them. Needs numpy.
+        """
+        import numpy as np
+        return {
+            "time": np.frombuffer(self.times, dtype=np.float64).copy(),
+            "drink_id": np.frombuffer(self.drink_column, dtype=np.uint16).copy(),
+            "price_cents": np.frombuffer(self.price_column, dtype=np.int64).copy(),
+            "drink_names": list(self.drink_names),
+        }
+
+    def csv_chunks(self, chunk_size=10_000, start=0):
+        """
+        Yields the served drinks as CSV text, 'chunk_size' rows at a time
+        (the first chunk starts with the header), so a long history can be
+        streamed to a file or socket without building it in memory.
+        """
+        end = len(self.times)  # rows added while streaming go in the next export
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(["time", "drink", "price"])
+        for first in range(start, end, chunk_size):
+            for i in range(first, min(first + chunk_size, end)):
+                writer.writerow([f"{self.times[i]:.3f}", self.drink_names[self.drink_column[i]],
+                                 f"{self.price_column[i] / 100:.2f}"])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()  # no rows: just the header
+
+
+def analytics_from_journal(path, menu, **options):
+    """Builds SalesAnalytics from a journal file, using the recorded timestamps."""
+    analytics = SalesAnalytics(menu, **options)
+    for record, _ in read_journal(path):
+        analytics.record(record["e"], record["d"], record["t"])
+    return analytics
@@ -0,0 +1,80 @@
+"""
+Fleet-wide capacity planning in one NumPy pass.
+
+Needs numpy (pip install numpy). The GUI does not use this module, so
+numpy is not part of requirements.txt.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+BatchResult = namedtuple("BatchResult", ["feasible", "remaining", "max_servable", "missing"])
+
+
+def recipe_matrix(menu, ingredients=None):
+    """
+    Turns CoffeeMachine.MENU into a (drinks x ingredients) integer matrix.
+    Returns (drink_names, ingredient_names, matrix).
+    """
+    drink_names = list(menu)
+    if ingredients is None:
+        ingredients = []
+        for drink in menu.values():
+            for item in drink["ingredients"]:
+                if item not in ingredients:
+                    ingredients.append(item)
+
+    matrix = np.zeros((len(drink_names), len(ingredients)), dtype=np.int64)
+    for row, name in enumerate(drink_names):
+        for item, amount in menu[name]["ingredients"].items():
+            matrix[row, ingredients.index(item)] = amount
+    return drink_names, list(ingredients), matrix
+
+
+def inventory_matrix(machines, ingredients):
+    """Stacks the current levels of many CoffeeMachines into a (machines x ingredients) array."""
+    return np.array([[m.resources[item] for item in ingredients] for m in machines], dtype=np.int64)
+
+
+def order_counts(machine_ids, drink_ids, n_machines, n_drinks):
+    """
+    Turns a flat order queue (one machine id + drink id per order) into a
+    (machines x drinks) count matrix.
+    """
+    flat = np.asarray(machine_ids, dtype=np.int64) * n_drinks + np.asarray(drink_ids, dtype=np.int64)
+    counts = np.bincount(flat, minlength=n_machines * n_drinks)
+    return counts.reshape(n_machines, n_drinks)
+
+
+def evaluate_orders(inventories, counts, recipes):
+    """
+    inventories: (machines x ingredients) current levels
+    counts:      (machines x drinks) queued orders per machine
+    recipes:     (drinks x ingredients) from recipe_matrix()
+
+    Returns a BatchResult of arrays:
+      feasible      (machines,)               can the whole queue be served?
+      remaining     (machines x ingredients)  stock left afterwards (negative = shortfall)
+      max_servable  (machines x drinks)       how many of each drink the current stock allows
+      missing       (machines,)               index of the first short ingredient, -1 if none
+    """
+    inventories = np.asarray(inventories, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    recipes = np.asarray(recipes, dtype=np.int64)
+
+    # Total ingredient need per machine is just a matrix product
+    needed = counts @ recipes
+    remaining = inventories - needed
+    short = remaining < 0
+    feasible = ~short.any(axis=1)
+    missing = np.where(feasible, -1, short.argmax(axis=1))
+
+    # inventory // recipe for every (machine, drink, ingredient); ingredients
+    # a drink does not use must not limit it, so they count as "unlimited"
+    uses = recipes > 0
+    safe_recipes = np.where(uses, recipes, 1)
+    per_ingredient = inventories[:, None, :] // safe_recipes[None, :, :]
+    per_ingredient = np.where(uses[None, :, :], per_ingredient, np.iinfo(np.int64).max)
+    max_servable = per_ingredient.min(axis=2)
+
+    return BatchResult(feasible, remaining, max_servable, missing)
@@ -0,0 +1,86 @@
+from array import array
+import threading
+
+from .money import COIN_NAMES, DENOMINATIONS, coins_value, make_change
+
+# Coins loaded into a fresh machine: pennies, nickels, dimes, quarters, dollars
+DEFAULT_FLOAT = (100, 40, 50, 40, 10)
+
+
+class CashBox:
+    """
+    The coins inside the machine, one counter per denomination.
+
+    Counts live in a fixed-size integer array (one slot per coin type), so
+    every update is a handful of O(1) index writes. Writers take a lock;
+    readers never do: after each change an immutable tuple copy is
+    published and snapshot() simply returns it.
+    """
+
+    def __init__(self, counts=DEFAULT_FLOAT):
+        if len(counts) != len(DENOMINATIONS):
+            raise ValueError(f"Expected {len(DENOMINATIONS)} coin counts, got {len(counts)}")
+        self._counts = array("q", counts)
+        self._lock = threading.Lock()
+        self._snapshot = tuple(self._counts)
+
+    def _publish(self):
+        # Swapping one reference is atomic, so readers never see half an update
+        self._snapshot = tuple(self._counts)
+
+    def snapshot(self):
+        """Current coin counts (pennies ... dollars). Lock-free."""
+        return self._snapshot
+
+    def as_dict(self):
+        return dict(zip(COIN_NAMES, self._snapshot))
+
+    def total(self):
+        """Value of everything in the box, in cents."""
+        return coins_value(self._snapshot)
+
+    def can_make_change(self, amount):
+        """Can we pay out exactly 'amount' cents with the coins we hold right now?"""
+        return make_change(amount, self._snapshot) is not None
+
+    def settle(self, inserted, change):
+        """
+        Takes the customer's coins and pays out 'change' cents in one step.
+        The inserted coins can be used for the change.
+        Returns the coins handed back, or None (and changes nothing) if
+        exact change is impossible.
+        """
+        if any(count < 0 for count in inserted):
+            raise ValueError("Coin counts must not be negative")
+        with self._lock:
+            after_deposit = tuple(held + given for held, given in zip(self._counts, inserted))
+            coins = make_change(change, after_deposit)
+            if coins is None:
+                return None
+
+            for index, (given, returned) in enumerate(zip(inserted, coins)):
+                self._counts[index] += given - returned
+            self._publish()
+        return coins
+
+    def deposit(self, counts):
+        with self._lock:
+            for index, count in enumerate(counts):
+                self._counts[index] += count
+            self._publish()
+
+    def withdraw(self, counts):
+        """Takes coins out (e.g. emptying the box). Returns False if there are not enough."""
+        with self._lock:
+            if any(count > held for held, count in zip(self._counts, counts)):
+                return False
+            for index, count in enumerate(counts):
+                self._counts[index] -= count
+            self._publish()
+        return True
+
+    def set_counts(self, counts):
+        with self._lock:
+            for index, count in enumerate(counts):
+                self._counts[index] = count
+            self._publish()
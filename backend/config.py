@@ -0,0 +1,74 @@
+import json
+
+# Tank sizes of the standard machine (units as in MENU: ml of water/milk, g of coffee)
+DEFAULT_CAPACITY = {
+    "water": 300,
+    "milk": 200,
+    "coffee": 100,
+}
+
+# Warn when an ingredient drops below this share of its capacity,
+# unless the config gives its own threshold
+LOW_STOCK_FRACTION = 0.2
+
+
+def default_config():
+    return {"capacity": dict(DEFAULT_CAPACITY), "low_stock": {}, "hardware": {}}
+
+
+def load_config(path):
+    """
+    Reads a machine config (JSON), for example:
+
+        {
+            "capacity": {"water": 2000, "milk": 1000, "coffee": 500},
+            "low_stock": {"milk": 300},
+            "hardware": {"boiler": {"units": 2}, "time_scale": 0.1}
+        }
+
+    "hardware" overrides station settings (see hardware.py); its
+    "time_scale" speeds up the simulated brewing (1 = real time). Missing
+    sections fall back to the defaults. Raises ValueError if a value is
+    not a whole, non-negative number (hardware times may be fractions).
+    """
+    with open(path) as f:
+        raw = json.load(f)
+
+    config = default_config()
+    if "capacity" in raw:
+        config["capacity"] = dict(raw["capacity"])
+    config["low_stock"] = dict(raw.get("low_stock", {}))
+    config["hardware"] = {name: settings if name == "time_scale" else dict(settings)
+                          for name, settings in raw.get("hardware", {}).items()}
+
+    for section in ("capacity", "low_stock"):
+        for item, amount in config[section].items():
+            if not isinstance(amount, int) or amount < 0:
+                raise ValueError(f"{section}.{item} must be a whole number >= 0, got {amount!r}")
+    unknown = set(config["low_stock"]) - set(config["capacity"])
+    if unknown:
+        raise ValueError(f"low_stock for ingredients without a capacity: {', '.join(sorted(unknown))}")
+
+    time_scale = config["hardware"].get("time_scale", 1)
+    if isinstance(time_scale, bool) or not isinstance(time_scale, (int, float)) or time_scale < 0:
+        raise ValueError(f"hardware.time_scale must be a number >= 0, got {time_scale!r}")
+
+    for station, settings in config["hardware"].items():
+        if station == "time_scale":
+            continue
+        for key in ("units", "batch"):
+            count = settings.get(key, 1)
+            if not isinstance(count, int) or count < 1:
+                raise ValueError(f"hardware.{station}.{key} must be a whole number >= 1, got {count!r}")
+        for key in ("setup", "per_unit"):
+            seconds = settings.get(key, 0)
+            if isinstance(seconds, bool) or not isinstance(seconds, (int, float)) or seconds < 0:
+                raise ValueError(f"hardware.{station}.{key} must be a number of seconds >= 0, got {seconds!r}")
+    return config
+
+
+def low_stock_thresholds(config):
+    """Threshold for every ingredient: the configured one or LOW_STOCK_FRACTION of capacity."""
+    thresholds = {item: int(amount * LOW_STOCK_FRACTION) for item, amount in config["capacity"].items()}
+    thresholds.update(config.get("low_stock", {}))
+    return thresholds
@@ -0,0 +1,145 @@
+"""
+Fleet simulation: many independent CoffeeMachines, each with its own
+stream of customers, sharded across a process pool.
+
+Every machine gets its own random seed (base seed + machine number), so
+the totals are the same however the fleet is split into shards or
+processes. Time is simulated; nothing sleeps.
+"""
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from .cash_box import DEFAULT_FLOAT
+from .logic import CoffeeMachine, cancel_order, pay_order, reserve_drink
+from .money import DENOMINATIONS
+
+# Counters every shard returns and the fleet adds up
+COUNTERS = ("customers", "served", "stockouts", "change_failures", "refills", "revenue_cents")
+
+
+def pay_for(cost_cents, rng):
+    """What a customer puts in: exact coins, whole dollars, or a bigger bill."""
+    style = rng.random()
+    if style < 0.4:
+        counts = [0] * len(DENOMINATIONS)
+        rest = cost_cents
+        for index in range(len(DENOMINATIONS) - 1, -1, -1):
+            counts[index], rest = divmod(rest, DENOMINATIONS[index])
+        return counts
+    dollars = -(-cost_cents // 100)
+    if style >= 0.9:
+        dollars += 5  # pays with a five, wants lots of change
+    return [0, 0, 0, 0, dollars]
+
+
+def simulate_machine(seed, hours, per_minute, config=None, refill_delay=900, mix=None):
+    """
+    Runs one machine for 'hours' of Poisson arrivals ('per_minute' on
+    average). An out-of-stock order calls the operator, who arrives
+    'refill_delay' seconds later and refills the tanks and the coin float.
+    Returns a dict of COUNTERS plus per-drink sales.
+    """
+    rng = random.Random(seed)
+    machine = CoffeeMachine(config)
+    menu = machine.menu
+    drink_ids = list(range(len(menu)))
+    weights = [mix.get(name, 0) for name in menu.names] if mix else None
+
+    result = dict.fromkeys(COUNTERS, 0)
+    sold = [0] * len(menu)
+    refill_at = None
+    now = 0.0
+    end = hours * 3600
+
+    while True:
+        now += rng.expovariate(per_minute / 60)
+        if now >= end:
+            break
+        if refill_at is not None and refill_at <= now:
+            machine.refill()
+            machine.cash_box.set_counts(DEFAULT_FLOAT)
+            result["refills"] += 1
+            refill_at = None
+
+        result["customers"] += 1
+        drink_id = rng.choices(drink_ids, weights)[0]
+        # Same steps as the kiosk: hold the ingredients, take the money, confirm
+        hold_id, _ = reserve_drink(menu.names[drink_id], coffee_machine=machine)
+        if hold_id is None:
+            result["stockouts"] += 1
+            if refill_at is None:
+                refill_at = now + refill_delay
+            continue
+
+        price = menu.prices[drink_id]
+        status, _, _ = pay_order(hold_id, price / 100, pay_for(price, rng), machine)
+        if status == "paid":
+            result["served"] += 1
+            result["revenue_cents"] += price
+            sold[drink_id] += 1
+        else:
+            # The machine could not give change: the customer keeps their money
+            cancel_order(hold_id, machine)
+            result["change_failures"] += 1
+
+    result["drinks"] = dict(zip(menu.names, sold))
+    return result
+
+
+def simulate_shard(job):
+    """Runs a range of machines in one process and returns their sum (plus served per machine)."""
+    first, count, base_seed, hours, per_minute, config, refill_delay, mix = job
+    totals = dict.fromkeys(COUNTERS, 0)
+    drinks = {}
+    served = []
+    for number in range(first, first + count):
+        result = simulate_machine(base_seed + number, hours, per_minute, config, refill_delay, mix)
+        for key in COUNTERS:
+            totals[key] += result[key]
+        for name, sold in result["drinks"].items():
+            drinks[name] = drinks.get(name, 0) + sold
+        served.append(result["served"])
+    totals["drinks"] = drinks
+    totals["served_per_machine"] = served
+    return totals
+
+
+def reduce_shards(shards):
+    """Adds up the shard results into fleet totals."""
+    fleet = dict.fromkeys(COUNTERS, 0)
+    drinks = {}
+    served = []
+    for shard in shards:
+        for key in COUNTERS:
+            fleet[key] += shard[key]
+        for name, sold in shard["drinks"].items():
+            drinks[name] = drinks.get(name, 0) + sold
+        served.extend(shard["served_per_machine"])
+    fleet["drinks"] = drinks
+    fleet["served_per_machine"] = served
+    return fleet
+
+
+def run_fleet(machines, hours=8, per_minute=0.5, workers=None, shards_per_worker=4, seed=0,
+              config=None, refill_delay=900, mix=None):
+    """
+    Simulates 'machines' machines on 'workers' processes (None = one per
+    CPU, 0 = in this process) and returns the fleet totals. The fleet is
+    cut into a few shards per worker so a slow shard does not hold up
+    the rest.
+    """
+    processes = (os.cpu_count() or 1) if workers is None else max(workers, 1)
+    shard_count = max(1, min(machines, processes * shards_per_worker))
+    size, extra = divmod(machines, shard_count)
+    jobs = []
+    first = 0
+    for index in range(shard_count):
+        count = size + (1 if index < extra else 0)
+        jobs.append((first, count, seed, hours, per_minute, config, refill_delay, mix))
+        first += count
+
+    if workers == 0:
+        return reduce_shards(map(simulate_shard, jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return reduce_shards(pool.map(simulate_shard, jobs))
@@ -0,0 +1,255 @@
+"""
+Brewing hardware: the grinder, boiler, milk frother and dispenser a drink
+passes through, in that order.
+
+Each station takes 'setup' seconds per job plus 'per_unit' seconds per
+ml (or g) of the ingredient it handles, and the machine may have several
+'units' of a station (e.g. two brew groups). One job can cover up to
+'batch' identical drinks (a two-spout brew group pulls two espressos at
+once), paying the setup only once. Two ways to use it:
+
+  SimulatedDriver   brews one drink in (scaled) real time, for the GUI
+  simulate_orders   discrete-event simulation of a whole queue of orders,
+                    for throughput and waiting-time numbers
+
+Time is in seconds. Nothing here touches the stock; that stays with
+Inventory and the hold/confirm flow in logic.py.
+"""
+import heapq
+import itertools
+import threading
+from collections import deque
+
+# Stages in the order a drink goes through them. "ingredient" is what the
+# per-unit time is counted in (None = the whole drink, coffee excluded).
+DEFAULT_STATIONS = {
+    "grinder": {"ingredient": "coffee", "units": 1, "setup": 2.0, "per_unit": 0.25, "batch": 4},
+    "boiler": {"ingredient": "water", "units": 1, "setup": 20.0, "per_unit": 0.12, "batch": 2},
+    "frother": {"ingredient": "milk", "units": 1, "setup": 3.0, "per_unit": 0.15, "batch": 2},
+    "dispenser": {"ingredient": None, "units": 1, "setup": 1.0, "per_unit": 0.02, "batch": 2},
+}
+
+# Ingredients the dispenser does not pour (they stay in the grinder's puck)
+SOLID_INGREDIENTS = {"coffee"}
+
+# Key in the "hardware" section that sets SimulatedDriver's time_scale
+# instead of a station (e.g. 0.1 brews ten times faster than real life)
+TIME_SCALE_KEY = "time_scale"
+
+
+def load_stations(overrides=None):
+    """
+    DEFAULT_STATIONS with the machine config's "hardware" section on top,
+    e.g. {"boiler": {"units": 2}}. Stations not in the defaults are
+    added at the end and need an ingredient, setup and per_unit.
+    The "time_scale" key is skipped (see SimulatedDriver).
+    """
+    stations = {name: dict(settings) for name, settings in DEFAULT_STATIONS.items()}
+    for name, settings in (overrides or {}).items():
+        if name == TIME_SCALE_KEY:
+            continue
+        stations.setdefault(name, {"units": 1, "batch": 1}).update(settings)
+    return stations
+
+
+def stage_amount(station, recipe):
+    """How much of the recipe the station handles (0 = the drink skips it)."""
+    ingredient = station["ingredient"]
+    if ingredient is None:
+        return sum(amount for item, amount in recipe.items() if item not in SOLID_INGREDIENTS)
+    return recipe.get(ingredient, 0)
+
+
+def route(recipe, stations, count=1):
+    """
+    [(station name, seconds), ...] that 'count' identical drinks spend at
+    each station they need. A station takes them 'batch' at a time.
+    """
+    steps = []
+    for name, station in stations.items():
+        amount = stage_amount(station, recipe)
+        if amount:
+            jobs = -(-count // station.get("batch", 1))
+            steps.append((name, jobs * station["setup"] + station["per_unit"] * amount * count))
+    return steps
+
+
+class SimulatedDriver:
+    """
+    Brews in real time without real hardware: waits out each stage of the
+    drink's route. time_scale shrinks the waits (0.1 = ten times faster,
+    0 = instant), which is what scripts and benchmarks use.
+
+    The machine can only make one drink at a time this way, so brew()
+    calls from several threads take turns.
+    """
+
+    def __init__(self, stations=None, time_scale=1.0):
+        self.stations = load_stations() if stations is None else stations
+        self.time_scale = time_scale
+        self._lock = threading.Lock()
+
+    def brew_seconds(self, recipe, count=1):
+        return sum(seconds for _, seconds in route(recipe, self.stations, count)) * self.time_scale
+
+    def brew(self, recipe, progress=None, stop=None, count=1):
+        """
+        Runs 'count' of the drink through its stations. progress(fraction,
+        station) is called as it goes. Returns False if 'stop' (a
+        threading.Event) is set before the drinks are done.
+        """
+        steps = [(name, seconds * self.time_scale) for name, seconds in route(recipe, self.stations, count)]
+        total = sum(seconds for _, seconds in steps) or 1.0
+        stop = stop or threading.Event()
+        elapsed = 0.0
+        with self._lock:
+            for name, seconds in steps:
+                # Report about 10 times a second, so a progress bar moves smoothly
+                ticks = max(1, int(seconds * 10))
+                for _ in range(ticks):
+                    if stop.wait(seconds / ticks):
+                        return False
+                    elapsed += seconds / ticks
+                    if progress is not None:
+                        progress(min(elapsed / total, 1.0), name)
+        return True
+
+
+def simulate_orders(orders, menu, stations=None, max_in_progress=None, order_queue=None):
+    """
+    Discrete-event simulation of 'orders' on one machine. Each order is
+    (arrival time, drink name), optionally followed by a priority and a
+    source for the order queue.
+
+    Orders wait in line until the machine takes them; then every station
+    serves its own queue. Stages are pipelined: a drink moves on as soon
+    as a station is done with it, so the grinder works on the next order
+    while the boiler brews this one. max_in_progress caps how many jobs
+    are on the machine at once (default: one per station unit); 1 means
+    one order at a time, with nothing overlapping.
+
+    The line is first come, first served, one drink per job. With an
+    OrderQueue (see order_queue.py) the queue decides what goes next,
+    and a batch of identical drinks goes through as one job.
+
+    Returns (records, busy_seconds): one record per order (in order)
+    with its start, finish, wait (time in line before the machine took
+    it) and total time, and how many seconds each station spent working.
+    """
+    stations = load_stations() if stations is None else stations
+    if max_in_progress is None:
+        max_in_progress = sum(station["units"] for station in stations.values())
+    records = [{"drink": order[1], "priority": order[2] if len(order) > 2 else None,
+                "arrival": order[0], "start": None, "finish": None} for order in orders]
+
+    free = {name: station["units"] for name, station in stations.items()}
+    waiting = {name: deque() for name in stations}
+    busy_seconds = dict.fromkeys(stations, 0.0)
+    line = deque()    # without an order queue: orders that are not on the machine yet
+    queued = {}       # with one: its order id -> index in 'orders'
+    jobs = []         # (route, [order indices], batch taken from the order queue)
+    in_progress = 0
+    events = []       # heap of (time, tie-breaker, index, stage); stage -1 = arrival of order 'index'
+    counter = itertools.count()
+
+    def start_waiting(name, now):
+        while free[name] and waiting[name]:
+            job, stage = waiting[name].popleft()
+            free[name] -= 1
+            seconds = jobs[job][0][stage][1]
+            busy_seconds[name] += seconds
+            heapq.heappush(events, (now + seconds, next(counter), job, stage))
+
+    def enqueue(job, stage, now):
+        name = jobs[job][0][stage][0]
+        waiting[name].append((job, stage))
+        start_waiting(name, now)
+
+    def admit(now):
+        nonlocal in_progress
+        while in_progress < max_in_progress:
+            if order_queue is None:
+                if not line:
+                    return
+                batch = None
+                members = [line.popleft()]
+            else:
+                batch = order_queue.next_batch(now)
+                if not batch:
+                    return
+                members = [queued.pop(order.order_id) for order in batch]
+            steps = route(menu.recipe(records[members[0]]["drink"]), stations, len(members))
+            for index in members:
+                records[index]["start"] = now
+            jobs.append((steps, members, batch))
+            if steps:
+                in_progress += 1
+                enqueue(len(jobs) - 1, 0, now)
+            else:
+                finish(len(jobs) - 1, now)
+
+    def finish(job, now):
+        steps, members, batch = jobs[job]
+        for index in members:
+            records[index]["finish"] = now
+        if batch:
+            order_queue.finish(batch, now=now)
+
+    for index, order in enumerate(orders):
+        heapq.heappush(events, (order[0], next(counter), index, -1))
+
+    while events:
+        now, _, index, stage = heapq.heappop(events)
+        if stage < 0:
+            if order_queue is None:
+                line.append(index)
+            else:
+                queued[order_queue.submit(*orders[index][1:], now=now)] = index
+            admit(now)
+            continue
+        # A station finished: free the unit for the next job in its line
+        steps = jobs[index][0]
+        name = steps[stage][0]
+        free[name] += 1
+        start_waiting(name, now)
+        if stage + 1 < len(steps):
+            enqueue(index, stage + 1, now)
+        else:
+            finish(index, now)
+            in_progress -= 1
+            admit(now)
+
+    for record in records:
+        record["wait"] = record["start"] - record["arrival"]
+        record["total"] = record["finish"] - record["arrival"]
+    return records, busy_seconds
+
+
+def throughput_report(records, busy_seconds, stations=None):
+    """Drinks per hour, waiting times and how busy each station was."""
+    stations = load_stations() if stations is None else stations
+    if not records:
+        return {"drinks": 0, "drinks_per_hour": 0.0, "wait": {}, "total": {}, "utilisation": {}}
+    first = min(record["arrival"] for record in records)
+    last = max(record["finish"] for record in records)
+    span = max(last - first, 1e-9)
+    waits = sorted(record["wait"] for record in records)
+    totals = sorted(record["total"] for record in records)
+
+    def stats(values):
+        return {
+            "mean": round(sum(values) / len(values), 2),
+            "p50": round(values[len(values) // 2], 2),
+            "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+            "max": round(values[-1], 2),
+        }
+
+    return {
+        "drinks": len(records),
+        "drinks_per_hour": round(len(records) / span * 3600, 1),
+        "makespan": round(span, 1),
+        "wait": stats(waits),
+        "total": stats(totals),
+        "utilisation": {name: round(busy_seconds[name] / span / stations[name]["units"], 3)
+                        for name in stations},
+    }
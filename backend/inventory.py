@@ -0,0 +1,161 @@
+import asyncio
+import threading
+
+
+def check_top_up(amounts):
+    """Raises ValueError if any top-up amount is negative (a top-up never takes stock out)."""
+    for item, amount in amounts.items():
+        if amount < 0:
+            raise ValueError(f"Cannot top up {item} by a negative amount ({amount})")
+
+
+class Reservation:
+    """
+    Ingredients taken out of an Inventory but not yet final.
+    Call inventory.commit(...) once the drink is sold or
+    inventory.rollback(...) to put everything back.
+    """
+
+    def __init__(self, amounts, label=None):
+        self.amounts = amounts
+        self.label = label  # what the hold is for, e.g. a drink name
+        self.state = "held"  # held -> committed | rolled_back
+
+
+class Inventory:
+    """
+    Thread-safe ingredient stock.
+
+    One lock guards all levels. Every drink on the menu needs water and
+    coffee, so per-ingredient locks could not let two orders run side by
+    side anyway, and they cost more to take (see bench_inventory.py).
+
+    reserve() checks AND subtracts while holding the lock, so two orders
+    can no longer both pass the check and drive a level negative.
+
+    Reserved amounts are tracked until they are committed or rolled back:
+    the levels are what can still be sold, stock() is what is in the
+    tanks (levels + held), which is what snapshots and the journal store.
+
+    capacity caps top_up()/fill() and counts held stock as already in the
+    tank, so rolling a hold back after a refill never overfills it.
+
+    When a deduction takes an ingredient below its low_stock threshold,
+    on_low_stock(item, level) is called (once per crossing; it re-arms
+    when the level goes back up).
+    """
+
+    def __init__(self, levels, capacity=None, low_stock=None):
+        self._levels = dict(levels)
+        self._held = dict.fromkeys(levels, 0)  # reserved, not committed yet
+        self._lock = threading.Lock()
+        self.capacity = dict(capacity) if capacity is not None else dict(levels)
+        self.low_stock = dict(low_stock) if low_stock is not None else {}
+        self.on_low_stock = None
+
+    def reserve(self, amounts):
+        """
+        Takes ALL the amounts or nothing.
+        Returns (Reservation, None) on success or (None, missing_item).
+        """
+        with self._lock:
+            # 1. Check everything first (in recipe order, for the error message)
+            for item, amount in amounts.items():
+                if self._levels[item] < amount:
+                    return None, item
+
+            # 2. All good, subtract while we still hold the lock
+            crossed = None
+            for item, amount in amounts.items():
+                level = self._levels[item] - amount
+                self._levels[item] = level
+                self._held[item] += amount
+                # Only the step that goes below the threshold counts
+                threshold = self.low_stock.get(item)
+                if threshold is not None and level < threshold <= level + amount:
+                    crossed = crossed or []
+                    crossed.append((item, level))
+
+        if crossed and self.on_low_stock is not None:
+            for item, level in crossed:
+                self.on_low_stock(item, level)
+        return Reservation(dict(amounts)), None
+
+    def commit(self, reservation):
+        """Makes a reservation final (the stock is gone for good)."""
+        if reservation.state != "held":
+            raise ValueError(f"Reservation is already {reservation.state}")
+        reservation.state = "committed"
+
+        with self._lock:
+            for item, amount in reservation.amounts.items():
+                self._held[item] -= amount
+
+    def rollback(self, reservation):
+        """Puts the reserved ingredients back."""
+        if reservation.state != "held":
+            raise ValueError(f"Reservation is already {reservation.state}")
+        reservation.state = "rolled_back"
+
+        with self._lock:
+            for item, amount in reservation.amounts.items():
+                self._levels[item] += amount
+                self._held[item] -= amount
+
+    def take(self, amounts):
+        """reserve() + commit() in one go. Returns (True, None) or (False, missing_item)."""
+        reservation, missing_item = self.reserve(amounts)
+        if reservation is None:
+            return False, missing_item
+        self.commit(reservation)
+        return True, None
+
+    def set_levels(self, levels):
+        with self._lock:
+            self._levels.update(levels)
+
+    def top_up(self, amounts):
+        """
+        Adds some of each ingredient, never past its capacity.
+        Returns the new stock (see stock()) of the ingredients that were topped up.
+        Raises ValueError (before changing anything) for a negative amount.
+        """
+        check_top_up(amounts)
+        with self._lock:
+            levels = {}
+            for item, amount in amounts.items():
+                level = min(self._levels[item] + amount, self.capacity[item] - self._held[item])
+                self._levels[item] = level
+                levels[item] = level + self._held[item]
+            return levels
+
+    def fill(self, items=None):
+        """Fills the given ingredients (default: all) to capacity. Returns their new stock."""
+        items = self.capacity if items is None else items
+        with self._lock:
+            levels = {}
+            for item in items:
+                level = self.capacity[item] - self._held[item]
+                self._levels[item] = level
+                levels[item] = level + self._held[item]
+            return levels
+
+    def snapshot(self):
+        """A consistent copy of all levels."""
+        with self._lock:
+            return dict(self._levels)
+
+    def stock(self):
+        """Like snapshot(), but reserved amounts still count (they are still in the tanks)."""
+        with self._lock:
+            return {item: level + self._held[item] for item, level in self._levels.items()}
+
+    # --- asyncio helpers ---
+    # The lock is only held for a few dict updates, but we still hop to a
+    # worker thread so the event loop never blocks on another thread.
+
+    async def reserve_async(self, amounts):
+        return await asyncio.to_thread(self.reserve, amounts)
+
+    async def rollback_async(self, reservation):
+        return await asyncio.to_thread(self.rollback, reservation)
@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+import time
+
+# Defaults for group commit: write + fsync once this many events are
+# buffered, or once the oldest buffered event is this old (seconds)
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL = 0.05
+
+
+class Journal:
+    """
+    Append-only log of everything that changes a CoffeeMachine
+    (orders, payments, refills), one compact JSON object per line:
+
+        {"s":12,"t":1700000000.1,"e":"order","d":{"drink":"latte",...}}
+
+    append() only puts the event in a buffer. A background writer thread
+    writes the buffer and fsyncs it once DEFAULT_BATCH_SIZE events pile
+    up or DEFAULT_FLUSH_INTERVAL has passed (group commit), so orders do
+    not wait on the disk one by one.
+
+    If the writer fails (e.g. the disk is full), it stops, and append()
+    and flush() raise OSError from then on instead of buffering events
+    that will never reach the disk.
+
+    A Journal can be passed straight to CoffeeMachine.subscribe().
+    """
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 fsync=True, start_seq=0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        self._buffer = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self.error = None  # what stopped the writer thread, if anything
+
+        self._file = open_for_append(path)
+        # start_seq keeps numbering above a snapshot even if the journal lost its tail
+        self.seq = max(last_sequence(path), start_seq)
+        # Last sequence number that reached the disk, and the byte offset
+        # right after it (snapshots use these to know where to resume)
+        self.written_seq = self.seq
+        self.written_offset = self._file.tell()
+
+        self._writer = threading.Thread(target=self._write_loop, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    def append(self, event_type, data):
+        """Buffers one event and returns its sequence number."""
+        with self._cond:
+            if self._closed:
+                raise ValueError("Journal is closed")
+            self._check_writer()
+            self.seq += 1
+            record = {"s": self.seq, "t": round(time.time(), 3), "e": event_type, "d": data}
+            self._buffer.append(json.dumps(record, separators=(",", ":")))
+            # Wake the writer for the first event of a batch and when it is full
+            if len(self._buffer) == 1 or len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+            return self.seq
+
+    # Lets a Journal be used directly as a CoffeeMachine listener
+    __call__ = append
+
+    def _check_writer(self):
+        # Called with _cond held
+        if self.error is not None:
+            raise OSError(f"Journal writer stopped: {self.error}") from self.error
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                if not self._buffer and not self._closed:
+                    self._cond.wait()
+                if self._buffer and len(self._buffer) < self.batch_size and not self._closed:
+                    # Give the batch a moment to fill up (group commit)
+                    self._cond.wait(self.flush_interval)
+                batch, self._buffer = self._buffer, []
+                last_seq = self.seq
+                closed = self._closed
+
+            if batch:
+                try:
+                    self._file.write("\n".join(batch) + "\n")
+                    self._file.flush()
+                    if self.fsync:
+                        os.fsync(self._file.fileno())
+                except OSError as error:
+                    # Wake anyone waiting in flush(); they and append() raise from now on
+                    with self._cond:
+                        self.error = error
+                        self._cond.notify_all()
+                    return
+
+            with self._cond:
+                self.written_seq = last_seq
+                self.written_offset = self._file.tell()
+                self._cond.notify_all()
+            if closed and not batch:
+                return
+
+    def flush(self, timeout=None):
+        """
+        Blocks until everything appended so far is on disk. Raises OSError
+        if the writer failed.
+        """
+        with self._cond:
+            target = self.seq
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: self.written_seq >= target or self.error is not None, timeout)
+            self._check_writer()
+            return done
+
+    def position(self):
+        """(last sequence number handed out, byte offset of what is already on disk)."""
+        with self._cond:
+            return self.seq, self.written_offset
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        try:
+            self._file.close()
+        except OSError:
+            pass  # the writer already reported why the journal is incomplete
+
+
+def open_for_append(path):
+    """Opens the journal, cutting off a half-written last line left by a crash."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    f = open(path, "a+b")
+    size = f.seek(0, os.SEEK_END)
+    if size:
+        # Find the last complete line
+        chunk = min(size, 64 * 1024)
+        f.seek(size - chunk)
+        tail = f.read(chunk)
+        if not tail.endswith(b"\n"):
+            cut = tail.rfind(b"\n")
+            f.truncate(size - chunk + cut + 1 if cut >= 0 else 0)
+    f.close()
+    return open(path, "a", encoding="utf-8")
+
+
+def last_sequence(path):
+    """Sequence number of the last complete record (reads only the tail)."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        chunk = min(size, 64 * 1024)
+        f.seek(size - chunk)
+        for line in reversed(f.read(chunk).splitlines()):
+            try:
+                return json.loads(line)["s"]
+            except (ValueError, KeyError):
+                continue
+    return 0
+
+
+def read_journal(path, offset=0, after_seq=0):
+    """
+    Yields (record, end_offset) for every complete record after 'offset'
+    bytes whose sequence number is above after_seq. A torn last line is
+    skipped.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            offset += len(line)
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if record["s"] > after_seq:
+                yield record, offset
+
+
+def apply_event(coffee_machine, event_type, data):
+    """Re-applies one journaled event to a machine (used during recovery)."""
+    if event_type == "order":
+        coffee_machine.inventory.take(data["ingredients"])
+    elif event_type == "payment":
+        coffee_machine.cash_box.deposit(data["inserted"])
+        coffee_machine.cash_box.withdraw(data["change"])
+    elif event_type == "refill":
+        coffee_machine.inventory.set_levels(data["levels"])
+
+
+def replay(coffee_machine, path, offset=0, after_seq=0):
+    """Applies every journaled event to the machine. Returns (events applied, last seq)."""
+    count = 0
+    last_seq = after_seq
+    for record, _ in read_journal(path, offset, after_seq):
+        apply_event(coffee_machine, record["e"], record["d"])
+        last_seq = record["s"]
+        count += 1
+    return count, last_seq
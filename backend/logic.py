@@ -1,10 +1,37 @@
+import threading
+
+from .inventory import Inventory
+from .config import default_config, load_config, low_stock_thresholds
+from .menu import CompiledMenu, load_menu
+from .shared_state import SharedMachineState
+from .reservations import HoldBook
+from .hardware import TIME_SCALE_KEY, SimulatedDriver, load_stations
+from .money import MAX_COIN_COUNT, coins_value, to_cents, to_dollars
+from .cash_box import CashBox
+from .journal import Journal
+from .snapshot import DEFAULT_SNAPSHOT_EVERY, Snapshotter, recover
+from .analytics import SalesAnalytics
+from .refill_scheduler import RefillScheduler
+from .order_queue import Barista, OrderQueue
+
+
+def check_tanks(menu, capacity):
+    """Raises ValueError if a drink uses an ingredient the machine has no tank for."""
+    missing = {item for drink in menu.values() for item in drink["ingredients"]} - set(capacity)
+    if missing:
+        raise ValueError(f"The machine has no tank for: {', '.join(sorted(missing))}")
+
+
 class CoffeeMachine:
-    def __init__(self):
-        self.resources = {
-            "water": 300,
-            "milk": 200,
-            "coffee": 100,
-        }
+    def __init__(self, config=None):
+        # Coins available for giving change
+        self.cash_box = CashBox()
+        # Called as listener(event_type, data) after every order, payment
+        # and refill (journal, analytics, ...). See subscribe().
+        self.listeners = []
+        # Held around every change that is journaled AND its event, so a
+        # snapshot (taken under it too) never sees one without the other
+        self.state_lock = threading.RLock()
         self.MENU = {
             "espresso": {
                 "ingredients": {
@@ -30,52 +57,329 @@ class CoffeeMachine:
                 "cost": 3.0,
             }
         }
+        # Tank sizes and low-stock thresholds (see config.py)
+        self.configure(config or default_config())
 
-    def refill(self):
-        self.resources = {
-            "water": 300,
-            "milk": 200,
-            "coffee": 100,
-        }
+    def configure(self, config):
+        """
+        Sets up full tanks for the given config. Starts a fresh inventory,
+        so only call it before the machine takes orders.
+        """
+        capacity = config["capacity"]
+        check_tanks(self.MENU, capacity)
+        self.config = config
+        # Thread-safe stock (see inventory.py)
+        self.shared_state = None
+        self.inventory = Inventory(capacity, capacity=capacity, low_stock=low_stock_thresholds(config))
+        self.inventory.on_low_stock = self._low_stock
+        # Ingredients held for customers who are still paying
+        self.holds = HoldBook(self.inventory)
+        # Indexed copy of MENU (ingredient vectors, prices in cents, drink ids)
+        self.menu = CompiledMenu(self.MENU, ingredients=capacity)
+        # Grinder, boiler, frother and dispenser (see hardware.py)
+        hardware = config.get("hardware", {})
+        self.hardware = SimulatedDriver(load_stations(hardware), hardware.get(TIME_SCALE_KEY, 1.0))
+
+    def set_menu(self, menu):
+        """Replaces MENU (e.g. with load_menu(path)). Every ingredient needs a tank."""
+        check_tanks(menu, self.inventory.capacity)
+        self.MENU = menu
+        self.menu = CompiledMenu(menu, ingredients=self.inventory.capacity)
+
+    def use_shared_state(self, state):
+        """
+        Switches stock and coins to a SharedMachineState, so this process
+        and every other one attached to it work on the same numbers.
+        """
+        check_tanks(self.MENU, state.inventory.capacity)
+        self.shared_state = state
+        self.inventory = state.inventory
+        self.inventory.on_low_stock = self._low_stock
+        self.holds = HoldBook(self.inventory)
+        self.cash_box = state.cash_box
+        self.menu = CompiledMenu(self.MENU, ingredients=state.inventory.capacity)
 
+    def _low_stock(self, item, level):
+        if self.listeners:
+            self.emit("low_stock", {"ingredient": item, "level": level,
+                                    "threshold": self.inventory.low_stock[item]})
+
+    @property
+    def resources(self):
+        # Read-only copy of the current levels
+        return self.inventory.snapshot()
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def emit(self, event_type, data):
+        for listener in self.listeners:
+            listener(event_type, data)
+
+    def refill(self, items=None):
+        """Fills the given ingredients (default: all) to capacity."""
+        with self.state_lock:
+            levels = self.inventory.fill(items)
+            if self.listeners:
+                self.emit("refill", {"levels": levels})
+
+    def top_up(self, amounts):
+        """Partial refill, e.g. top_up({"milk": 500}). Levels stop at capacity."""
+        with self.state_lock:
+            levels = self.inventory.top_up(amounts)
+            if self.listeners:
+                self.emit("refill", {"levels": levels})
+        return levels
+
+# Default machine used by the GUI. Every function below also accepts its
+# own CoffeeMachine, so several machines can live in one process.
 machine = CoffeeMachine()
 
-def verify_resources(drink_name):
+def verify_resources(drink_name, coffee_machine=None):
     """
     Checks if resources are sufficient. 
     If yes, deducts them and returns True.
     If no, returns False and the missing ingredient.
     """
-    drink = machine.MENU[drink_name]
-    ingredients = drink["ingredients"]
+    coffee_machine = coffee_machine or machine
+    recipe = coffee_machine.menu.recipe(drink_name)
 
-    # 1. Check if we have enough first
-    for item, amount in ingredients.items():
-        if machine.resources[item] < amount:
-            return False, item  # Return False and the missing item name
+    # Check + subtract happen atomically, so concurrent orders are safe
+    with coffee_machine.state_lock:
+        is_enough, missing_item = coffee_machine.inventory.take(recipe)
+        if is_enough and coffee_machine.listeners:
+            coffee_machine.emit("order", {"drink": drink_name, "ingredients": recipe})
+    return is_enough, missing_item
 
-    # 2. If we are here, we have enough. Now subtract.
-    for item, amount in ingredients.items():
-        machine.resources[item] -= amount
 
-    return True, None
+def reserve_drink(drink_name, ttl=None, coffee_machine=None):
+    """
+    Puts the drink's ingredients on hold until the customer pays.
+    Returns (hold_id, None) or (None, missing_ingredient).
+    The hold is released automatically after ttl seconds.
+    """
+    coffee_machine = coffee_machine or machine
+    # The drink name rides along so confirm_order() can report what was sold
+    return coffee_machine.holds.hold(coffee_machine.menu.recipe(drink_name), ttl, label=drink_name)
 
 
-def process_payment(total_cost, no_pennies, no_nickels, no_dimes, no_quarters, no_dollars):
-    # Calculate value by multiplying count by coin value
-    val_pennies = no_pennies * 0.01
-    val_nickels = no_nickels * 0.05
-    val_dimes = no_dimes * 0.10
-    val_quarters = no_quarters * 0.25
+def confirm_order(hold_id, coffee_machine=None):
+    """Call after a successful payment. False means the hold already timed out."""
+    coffee_machine = coffee_machine or machine
+    with coffee_machine.state_lock:
+        reservation = coffee_machine.holds.confirm(hold_id)
+        if reservation is None:
+            return False
+        if coffee_machine.listeners:
+            coffee_machine.emit("order", {"drink": reservation.label, "ingredients": reservation.amounts})
+    return True
 
-    payment = val_pennies + val_nickels + val_dimes + val_quarters + no_dollars
 
-    # CRITICAL: Round to 2 decimal places to prevent floating-point errors
-    payment = round(payment, 2)
+def brew_drink(drink_name, progress=None, stop=None, coffee_machine=None):
+    """
+    Makes a paid-for drink on the machine's hardware. progress(fraction,
+    station) is called along the way. Returns False if 'stop' was set
+    before it was done.
+    """
+    coffee_machine = coffee_machine or machine
+    return coffee_machine.hardware.brew(coffee_machine.menu.recipe(drink_name), progress, stop)
+
+
+def available_drinks(coffee_machine=None):
+    """Names of the drinks there is enough stock for right now (for greying out buttons)."""
+    coffee_machine = coffee_machine or machine
+    menu = coffee_machine.menu
+    return [menu.names[drink_id] for drink_id in menu.available(coffee_machine.resources)]
+
+
+def hold_active(hold_id, coffee_machine=None):
+    """Is the hold still valid? Check this before taking the customer's money."""
+    coffee_machine = coffee_machine or machine
+    return coffee_machine.holds.is_active(hold_id)
+
+
+def cancel_order(hold_id, coffee_machine=None):
+    """Gives the held ingredients back (customer walked away or cancelled)."""
+    coffee_machine = coffee_machine or machine
+    return coffee_machine.holds.cancel(hold_id)
+
+
+def release_expired_holds(coffee_machine=None):
+    coffee_machine = coffee_machine or machine
+    return coffee_machine.holds.sweep()
+
+
+def configure_machine(path, coffee_machine=None):
+    """Loads a machine config file (see config.py) and applies it. Call before taking orders."""
+    coffee_machine = coffee_machine or machine
+    coffee_machine.configure(load_config(path))
+    return coffee_machine.config
+
+
+def configure_menu(path, coffee_machine=None):
+    """Loads a menu file (see menu.py) in place of the built-in MENU. Call before taking orders."""
+    coffee_machine = coffee_machine or machine
+    coffee_machine.set_menu(load_menu(path))
+    return coffee_machine.menu
+
+
+def attach_shared_state(name, coffee_machine=None):
+    """
+    Makes the machine use the shared-memory state called 'name' (created
+    with this machine's tanks and full levels if no process has made it
+    yet). Returns the SharedMachineState; close() it on shutdown.
+
+    Cannot be combined with a journal, see enable_journal().
+    """
+    coffee_machine = coffee_machine or machine
+    if any(isinstance(listener, Journal) for listener in coffee_machine.listeners):
+        raise ValueError("Shared state cannot be used together with a journal")
+    inventory = coffee_machine.inventory
+    state = SharedMachineState.open(name, inventory.capacity, inventory.low_stock)
+    coffee_machine.use_shared_state(state)
+    return state
+
+
+def enable_journal(path, coffee_machine=None, snapshot_path=None, snapshot_every=DEFAULT_SNAPSHOT_EVERY,
+                   **options):
+    """
+    Restores the machine from the latest snapshot plus the journal events
+    after it, then records every new order, payment and refill to the
+    journal at 'path' and snapshots the state every 'snapshot_every'
+    events (0 turns snapshots off). Returns the Journal; close() it on
+    shutdown so the last batch reaches the disk.
+
+    Not for machines on shared state: recovering would overwrite the
+    levels every other attached process is using, and each process only
+    sees its own orders.
+    """
+    coffee_machine = coffee_machine or machine
+    if coffee_machine.shared_state is not None:
+        raise ValueError("A journal cannot be used together with shared state")
+    if snapshot_path is None:
+        snapshot_path = path + ".snapshot"
+    recovered = recover(coffee_machine, path, snapshot_path)
+    journal = Journal(path, start_seq=recovered["last_seq"], **options)
+    coffee_machine.subscribe(journal)
+    if snapshot_every:
+        coffee_machine.subscribe(Snapshotter(coffee_machine, journal, snapshot_path, snapshot_every))
+    return journal
+
+
+def enable_analytics(coffee_machine=None, **options):
+    """Starts keeping sales statistics for the machine. Returns the SalesAnalytics."""
+    coffee_machine = coffee_machine or machine
+    analytics = SalesAnalytics(coffee_machine.MENU, **options)
+    coffee_machine.subscribe(analytics)
+    return analytics
+
+
+def enable_refill_scheduler(coffee_machine=None, start=True, **options):
+    """
+    Starts forecasting stock-outs: the machine emits "refill_due" events
+    ahead of time (see refill_scheduler.py). Returns the RefillScheduler.
+    """
+    coffee_machine = coffee_machine or machine
+    scheduler = RefillScheduler(coffee_machine, **options)
+    coffee_machine.subscribe(scheduler)
+    if start:
+        scheduler.start()
+    return scheduler
+
+
+def enable_order_queue(coffee_machine=None, start=True, **options):
+    """
+    Queues paid drinks for the hardware: priorities, fair turns and
+    batches of identical drinks (see order_queue.py). A Barista thread
+    brews them. Returns the Barista; its .queue takes the orders.
+    """
+    coffee_machine = coffee_machine or machine
+    order_queue = OrderQueue(coffee_machine.menu, coffee_machine.hardware.stations, **options)
+    barista = Barista(order_queue, coffee_machine)
+    if start:
+        barista.start()
+    return barista
+
+
+def process_payment(total_cost, no_pennies, no_nickels, no_dimes, no_quarters, no_dollars,
+                    coffee_machine=None):
+    """
+    Returns (True, change, change_coins) if the sale went through.
+    change is in dollars (for display), change_coins is a tuple with how
+    many pennies, nickels, dimes, quarters and dollars to hand back.
+
+    Returns (False, None, None) if not enough money was inserted, and
+    (False, change, None) if the cash box cannot give that change exactly
+    (the customer keeps their money in both cases).
+    Raises ValueError for a negative coin count or one above MAX_COIN_COUNT.
+    """
+    coffee_machine = coffee_machine or machine
+    inserted = (no_pennies, no_nickels, no_dimes, no_quarters, no_dollars)
+    if any(count < 0 for count in inserted):
+        # "-5 dollars" would otherwise pay for a drink by taking coins out of the box
+        raise ValueError("Coin counts must not be negative")
+    if any(count > MAX_COIN_COUNT for count in inserted):
+        raise ValueError(f"At most {MAX_COIN_COUNT} coins of each kind per payment")
+
+    # Work in whole cents so there are no floating-point errors to round away
+    payment = coins_value(inserted)
+    cost = to_cents(total_cost)
 
     # Check payment
-    if payment >= total_cost:
-        change = round(payment - total_cost, 2)
-        return True, change
+    if payment >= cost:
+        change = payment - cost
+        # Coins go into the box and change comes out in one atomic step
+        with coffee_machine.state_lock:
+            change_coins = coffee_machine.cash_box.settle(inserted, change)
+            if change_coins is None:
+                return False, to_dollars(change), None
+            if coffee_machine.listeners:
+                coffee_machine.emit("payment", {"cost": cost, "inserted": list(inserted),
+                                                "change": list(change_coins)})
+        return True, to_dollars(change), change_coins
     else:
-        return False, None
\ No newline at end of file
+        return False, None, None
+
+
+def pay_order(hold_id, total_cost, coins, coffee_machine=None):
+    """
+    Takes the customer's coins for a held drink and confirms the order.
+    Returns (status, change, change_coins) with status "paid",
+    "timed_out", "no_change" or "short".
+
+    The hold is pinned while the money is counted, so it cannot expire
+    after the coins went into the box (customer charged, stock released).
+    """
+    coffee_machine = coffee_machine or machine
+    if not coffee_machine.holds.pin(hold_id):
+        # Took longer than the hold allows, the ingredients were released
+        return "timed_out", None, None
+
+    is_enough = False
+    try:
+        is_enough, change, change_coins = process_payment(total_cost, *coins, coffee_machine=coffee_machine)
+        if is_enough:
+            confirm_order(hold_id, coffee_machine)
+            return "paid", change, change_coins
+    finally:
+        if not is_enough:
+            coffee_machine.holds.unpin(hold_id)
+
+    if change is not None:
+        # Enough money, but the machine cannot give that change exactly
+        return "no_change", change, None
+    return "short", None, None
+
+
+def exact_change_only(total_cost, coffee_machine=None):
+    """
+    True if the machine could not give change to someone paying with
+    whole dollar bills, so the GUI can warn before any money goes in.
+    """
+    coffee_machine = coffee_machine or machine
+    cost = to_cents(total_cost)
+    change = -cost % 100
+    return not coffee_machine.cash_box.can_make_change(change)
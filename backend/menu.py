@@ -0,0 +1,95 @@
+import json
+from operator import ge
+
+from .money import to_cents
+
+
+class CompiledMenu:
+    """
+    MENU turned into flat, indexed tables, built once per menu change.
+
+    Every drink gets a slot number (its drink id) and every ingredient a
+    fixed position, so a recipe is a plain tuple of amounts:
+
+        ingredients = ("water", "milk", "coffee")
+        vectors[latte_id] = (200, 150, 24)
+
+    prices are integer cents. recipes holds the non-zero amounts as a
+    ready-made dict, which is what Inventory.reserve() takes.
+    """
+
+    def __init__(self, menu, ingredients=None):
+        self.names = tuple(menu)
+        self.ids = {name: drink_id for drink_id, name in enumerate(self.names)}
+
+        ingredients = list(ingredients or ())
+        for drink in menu.values():
+            for item in drink["ingredients"]:
+                if item not in ingredients:
+                    ingredients.append(item)
+        self.ingredients = tuple(ingredients)
+
+        vectors, recipes, prices, titles, images = [], [], [], [], []
+        for name in self.names:
+            drink = menu[name]
+            amounts = drink["ingredients"]
+            vectors.append(tuple(amounts.get(item, 0) for item in self.ingredients))
+            recipes.append({item: amounts[item] for item in self.ingredients if amounts.get(item)})
+            prices.append(to_cents(drink["cost"]))
+            titles.append(drink.get("name", name.title()))
+            images.append(drink.get("image", f"{name.title()}Window.png"))
+        self.vectors = tuple(vectors)
+        self.recipes = tuple(recipes)
+        self.prices = tuple(prices)
+        self.titles = tuple(titles)
+        self.images = tuple(images)
+
+    def __len__(self):
+        return len(self.names)
+
+    def recipe(self, name):
+        return self.recipes[self.ids[name]]
+
+    def label(self, drink_id):
+        """Button text, e.g. 'Latte ($2.50)'."""
+        return f"{self.titles[drink_id]} (${self.prices[drink_id] / 100:.2f})"
+
+    def levels_vector(self, levels):
+        """Current levels (a dict) in this menu's ingredient order."""
+        return tuple(levels.get(item, 0) for item in self.ingredients)
+
+    def can_make(self, drink_id, levels_vector):
+        """One vector comparison: is there enough of every ingredient?"""
+        return all(map(ge, levels_vector, self.vectors[drink_id]))
+
+    def available(self, levels):
+        """Drink ids that could be made from 'levels' right now."""
+        vector = self.levels_vector(levels)
+        return [drink_id for drink_id in range(len(self.names)) if self.can_make(drink_id, vector)]
+
+
+def load_menu(path):
+    """
+    Reads a menu file (JSON, same shape as CoffeeMachine.MENU). Each drink
+    can also have a display "name" and a drink screen "image":
+
+        {"mocha": {"ingredients": {"water": 150, "milk": 100, "coffee": 24},
+                   "cost": 3.25, "name": "Mocha", "image": "LatteWindow.png"}}
+
+    Raises ValueError if a drink has no ingredients, a negative amount or
+    a price that is not a positive number.
+    """
+    with open(path) as f:
+        menu = json.load(f)
+    if not isinstance(menu, dict) or not menu:
+        raise ValueError("A menu needs at least one drink")
+    for name, drink in menu.items():
+        if not drink.get("ingredients"):
+            raise ValueError(f"{name}: no ingredients")
+        for item, amount in drink["ingredients"].items():
+            if not isinstance(amount, int) or amount < 0:
+                raise ValueError(f"{name}.{item} must be a whole number >= 0, got {amount!r}")
+        cost = drink.get("cost")
+        if isinstance(cost, bool) or not isinstance(cost, (int, float)) or cost <= 0:
+            raise ValueError(f"{name}: cost must be a positive number, got {cost!r}")
+    return menu
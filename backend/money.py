@@ -0,0 +1,117 @@
+from functools import lru_cache
+
+# Everything money-related is done in integer cents, so there is no
+# floating-point rounding to hide anywhere.
+
+# Coins/bills the machine takes and gives back, smallest first (in cents)
+DENOMINATIONS = (1, 5, 10, 25, 100)
+COIN_NAMES = ("pennies", "nickels", "dimes", "quarters", "dollars")
+SINGULAR_NAMES = ("penny", "nickel", "dime", "quarter", "dollar")
+
+# Most coins (or bills) of one kind a customer can put in for one payment
+MAX_COIN_COUNT = 1000
+
+# make_change() pays whole dollars straight away and only searches the
+# rest, plus this many dollars in case smaller coins have to stand in for
+# them. 1 would do: any 120 cents or more of smaller coins contain a
+# dollar's worth that can be swapped for a bill.
+CHANGE_WINDOW_DOLLARS = 2
+
+
+def to_cents(dollars):
+    """1.5 -> 150. Prices only ever have two decimals."""
+    return int(round(dollars * 100))
+
+
+def to_dollars(cents):
+    return cents / 100
+
+
+def coins_value(counts):
+    """Value in cents of (pennies, nickels, dimes, quarters, dollars)."""
+    return sum(count * value for count, value in zip(counts, DENOMINATIONS))
+
+
+@lru_cache(maxsize=4096)
+def make_change(amount, available=None):
+    """
+    Fewest-coins way to pay out 'amount' cents.
+
+    available is a tuple with how many of each coin the machine holds
+    (None = unlimited). Returns a tuple of coin counts in DENOMINATIONS
+    order, or None if exact change is impossible with those coins.
+
+    Results are memoized per (amount, available), so repeated
+    transactions with the same float state are a dictionary lookup.
+
+    Whole dollars are paid out first (as many as the machine has, minus
+    CHANGE_WINDOW_DOLLARS), so the search below only ever covers a few
+    dollars, however large the amount. It runs under the cash box lock.
+    """
+    if amount < 0:
+        return None
+    if amount == 0:
+        return (0,) * len(DENOMINATIONS)
+
+    dollar = DENOMINATIONS[-1]
+    dollars = amount // dollar
+    if available is not None:
+        dollars = min(dollars, available[-1])
+    paid = max(0, dollars - CHANGE_WINDOW_DOLLARS)
+    if paid:
+        if available is not None:
+            available = available[:-1] + (available[-1] - paid,)
+        counts = make_change(amount - paid * dollar, available)
+        if counts is None:
+            return None
+        return counts[:-1] + (counts[-1] + paid,)
+
+    # Bounded coin change as a 0/1 knapsack: each coin type is split into
+    # bundles of 1, 2, 4, ... coins so we only need log(count) items per type.
+    bundles = []
+    for index, value in enumerate(DENOMINATIONS):
+        limit = amount // value
+        if available is not None:
+            limit = min(limit, available[index])
+        size = 1
+        while limit > 0:
+            take = min(size, limit)
+            bundles.append((index, take))
+            limit -= take
+            size *= 2
+
+    unreachable = amount + 1  # more coins than any real answer could need
+    best = [0] + [unreachable] * amount
+    used = []
+    for index, count in bundles:
+        weight = count * DENOMINATIONS[index]
+        row = bytearray(amount + 1)
+        for total in range(amount, weight - 1, -1):
+            candidate = best[total - weight] + count
+            if candidate < best[total]:
+                best[total] = candidate
+                row[total] = 1
+        used.append(row)
+
+    if best[amount] == unreachable:
+        return None
+
+    # Walk back through the bundles to find which ones were used
+    counts = [0] * len(DENOMINATIONS)
+    remaining = amount
+    for (index, count), row in zip(reversed(bundles), reversed(used)):
+        if row[remaining]:
+            counts[index] += count
+            remaining -= count * DENOMINATIONS[index]
+    return tuple(counts)
+
+
+def describe_coins(counts):
+    """(0, 1, 1, 2, 0) -> '2 quarters, 1 dime, 1 nickel' (largest first)."""
+    parts = []
+    for index in reversed(range(len(DENOMINATIONS))):
+        count = counts[index]
+        if count:
+            name = SINGULAR_NAMES[index] if count == 1 else COIN_NAMES[index]
+            parts.append(f"{count} {name}")
+    return ", ".join(parts)
@@ -0,0 +1,251 @@
+"""
+Paid orders waiting for the brewing hardware.
+
+Orders are not simply served first come, first served:
+
+  priority   "high" orders (staff, pre-paid app orders) get a head start
+             of PRIORITY_HEAD_START seconds over "normal" ones, which get
+             the same over "low". It is a head start, not a jump to the
+             front, so a low-priority order is never stuck forever.
+  fairness   every order has a source (a kiosk, an app user, an office
+             ordering ten drinks). A source's orders are spaced out by
+             their brew time, so one big order does not hold up everybody
+             who comes after it (start-time fair queueing).
+  batching   when a drink is taken off the queue, identical drinks that
+             would come up soon anyway (within BATCH_WINDOW) go along, so
+             the hardware grinds and brews them together (see batch in
+             hardware.py).
+
+OrderQueue is thread-safe. Barista takes batches off it on its own
+thread and brews them on a CoffeeMachine's hardware.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+from .hardware import load_stations, route
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+DEFAULT_PRIORITY = "normal"
+
+# Seconds of queue time one priority level is worth
+PRIORITY_HEAD_START = 120
+
+# At most this many drinks per batch, and only drinks that would come up
+# within BATCH_WINDOW seconds (of queue time) of the first one
+DEFAULT_MAX_BATCH = 4
+BATCH_WINDOW = 90
+
+# Waits kept for the percentiles in stats(), finished orders kept for
+# status() (and sources remembered for fair queueing)
+WAIT_SAMPLES = 1000
+FINISHED_KEPT = 1000
+
+
+class QueuedOrder:
+    def __init__(self, order_id, drink, priority, source, queued_at, key):
+        self.order_id = order_id
+        self.drink = drink
+        self.priority = priority
+        self.source = source
+        self.queued_at = queued_at
+        self.key = key  # lower comes up sooner
+        self.state = "queued"  # -> "brewing" -> "ready" (or "failed")
+        self.started_at = None
+        self.finished_at = None
+
+    def as_dict(self):
+        return {"order_id": self.order_id, "drink": self.drink, "priority": self.priority,
+                "state": self.state}
+
+
+class OrderQueue:
+    """
+    Queue of paid orders, see the module docstring. submit() puts an
+    order in, next_batch() (or the blocking get_batch()) takes out the
+    next batch of identical drinks, finish() marks a batch as done.
+
+    Each drink has its own heap, so picking the next batch looks at one
+    entry per drink on the menu and batching never scans the queue.
+    """
+
+    def __init__(self, menu, stations=None, max_batch=DEFAULT_MAX_BATCH, batch_window=BATCH_WINDOW,
+                 head_start=PRIORITY_HEAD_START, clock=time.monotonic):
+        stations = load_stations() if stations is None else stations
+        # Brew time of one drink, used to space out a source's orders
+        self.brew_time = {name: sum(seconds for _, seconds in route(menu.recipe(name), stations))
+                          for name in menu.names}
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.head_start = head_start
+        self.clock = clock
+
+        self._lines = {}            # drink -> heap of (key, order_id, QueuedOrder)
+        self._orders = {}           # order_id -> QueuedOrder still queued or brewing
+        self._finished = OrderedDict()
+        self._source_tags = {}      # source -> when its next order may start, in queue time
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+
+        # Metrics
+        self.depth = 0
+        self.max_depth = 0
+        self.submitted = 0
+        self.dispatched = 0
+        self.batches = 0
+        self._waits = {name: deque(maxlen=WAIT_SAMPLES) for name in PRIORITIES}
+        self._depth_area = 0.0      # depth integrated over time, for the mean depth
+        self._started_at = None
+        self._changed_at = None
+
+    def __len__(self):
+        return self.depth
+
+    def _track_depth(self, now, change):
+        if self._started_at is None:
+            self._started_at = self._changed_at = now
+        self._depth_area += self.depth * (now - self._changed_at)
+        self._changed_at = now
+        self.depth += change
+        self.max_depth = max(self.max_depth, self.depth)
+
+    def submit(self, drink, priority=DEFAULT_PRIORITY, source=None, now=None):
+        """Queues a paid drink and returns its order id. source=None: the order stands on its own."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority!r}")
+        brew_time = self.brew_time[drink]
+        now = self.clock() if now is None else now
+        with self._cond:
+            # Fair queueing: a source's next order starts where its last one ends
+            tag = now
+            if source is not None:
+                tag = max(now, self._source_tags.get(source, now))
+                self._source_tags[source] = tag + brew_time
+                if len(self._source_tags) > FINISHED_KEPT:
+                    self._source_tags = {name: t for name, t in self._source_tags.items() if t > now}
+
+            order_id = next(self._ids)
+            order = QueuedOrder(order_id, drink, priority, source, now,
+                                tag + PRIORITIES[priority] * self.head_start)
+            heapq.heappush(self._lines.setdefault(drink, []), (order.key, order_id, order))
+            self._orders[order_id] = order
+            self.submitted += 1
+            self._track_depth(now, +1)
+            self._cond.notify()
+        return order_id
+
+    def next_batch(self, now=None):
+        """
+        Takes the next order plus identical ones due within batch_window.
+        Returns a list of QueuedOrder (empty if nothing is waiting).
+        """
+        now = self.clock() if now is None else now
+        with self._cond:
+            return self._take_batch(now)
+
+    def _take_batch(self, now):
+        heads = [(line[0][0], drink) for drink, line in self._lines.items() if line]
+        if not heads:
+            return []
+        first_key, drink = min(heads)
+        line = self._lines[drink]
+        batch = []
+        while line and len(batch) < self.max_batch and line[0][0] <= first_key + self.batch_window:
+            order = heapq.heappop(line)[2]
+            order.state = "brewing"
+            order.started_at = now
+            self._waits[order.priority].append(now - order.queued_at)
+            batch.append(order)
+        self.dispatched += len(batch)
+        self.batches += 1
+        self._track_depth(now, -len(batch))
+        return batch
+
+    def get_batch(self, timeout=None):
+        """next_batch() that waits up to 'timeout' seconds for an order to come in."""
+        with self._cond:
+            if not self.depth:
+                self._cond.wait(timeout)
+            return self._take_batch(self.clock())
+
+    def finish(self, batch, ok=True, now=None):
+        """Marks a batch as ready (or failed, if the hardware stopped)."""
+        now = self.clock() if now is None else now
+        with self._cond:
+            for order in batch:
+                order.state = "ready" if ok else "failed"
+                order.finished_at = now
+                self._orders.pop(order.order_id, None)
+                self._finished[order.order_id] = order
+            while len(self._finished) > FINISHED_KEPT:
+                self._finished.popitem(last=False)
+
+    def status(self, order_id):
+        """The order's state and, while queued, how many orders are ahead of it. None if unknown."""
+        with self._cond:
+            order = self._orders.get(order_id) or self._finished.get(order_id)
+            if order is None:
+                return None
+            status = order.as_dict()
+            if order.state == "queued":
+                status["ahead"] = sum(1 for line in self._lines.values()
+                                      for key, _, other in line if key < order.key)
+            return status
+
+    def stats(self, now=None):
+        """Queue depth and waiting times (seconds, per priority) for monitoring."""
+        now = self.clock() if now is None else now
+        with self._cond:
+            elapsed = now - self._started_at if self._started_at is not None else 0.0
+            area = self._depth_area + self.depth * (now - self._changed_at) if elapsed else 0.0
+            waits = {}
+            for priority, samples in self._waits.items():
+                if samples:
+                    ordered = sorted(samples)
+                    waits[priority] = {
+                        "p50": round(ordered[len(ordered) // 2], 2),
+                        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+                        "max": round(ordered[-1], 2),
+                    }
+            return {
+                "depth": self.depth,
+                "max_depth": self.max_depth,
+                "mean_depth": round(area / elapsed, 2) if elapsed else 0.0,
+                "submitted": self.submitted,
+                "dispatched": self.dispatched,
+                "batches": self.batches,
+                "mean_batch": round(self.dispatched / self.batches, 2) if self.batches else 0.0,
+                "wait": waits,
+            }
+
+
+class Barista:
+    """Brews batches from an OrderQueue on a CoffeeMachine's hardware, on a daemon thread."""
+
+    def __init__(self, order_queue, coffee_machine):
+        self.queue = order_queue
+        self.coffee_machine = coffee_machine
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="barista", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self.queue.get_batch(timeout=0.5)
+            if not batch:
+                continue
+            recipe = self.coffee_machine.menu.recipe(batch[0].drink)
+            ok = self.coffee_machine.hardware.brew(recipe, stop=self._stop, count=len(batch))
+            self.queue.finish(batch, ok)
@@ -0,0 +1,113 @@
+import math
+import threading
+import time
+
+# Defaults: check every 5 seconds, average rates over roughly the last
+# 10 minutes and ask for a refill when an ingredient is forecast to run
+# out within 10 minutes
+DEFAULT_INTERVAL = 5
+DEFAULT_TIME_CONSTANT = 600
+DEFAULT_LEAD_TIME = 600
+
+
+class RefillScheduler:
+    """
+    Forecasts when each ingredient will run out and asks for a refill
+    before it does.
+
+    As a CoffeeMachine listener it only adds each order's ingredients to
+    running counters. A timer thread (or tick() in simulations) turns
+    those counters into per-ingredient consumption rates with exponential
+    smoothing (older usage fades out over 'time_constant' seconds),
+    estimates the time left as level / rate, and emits a "refill_due"
+    event on the machine when that drops below lead_time:
+
+        {"ingredient": "milk", "level": 150, "per_minute": 40.0, "seconds_left": 225.0}
+
+    Each ingredient is reported once until the next refill.
+    """
+
+    def __init__(self, coffee_machine, lead_time=DEFAULT_LEAD_TIME, time_constant=DEFAULT_TIME_CONSTANT,
+                 interval=DEFAULT_INTERVAL, clock=time.monotonic):
+        self.coffee_machine = coffee_machine
+        self.lead_time = lead_time
+        self.time_constant = time_constant
+        self.interval = interval
+        self.clock = clock
+
+        self.rates = {}        # ingredient -> smoothed units per second
+        self._averages = {}    # ingredient -> exponential moving average (not yet corrected)
+        self._weight = 0.0     # how much history the averages hold so far (0 .. 1)
+        self.due = set()       # ingredients already reported since the last refill
+        self._used = {}        # ingredient -> units used since the last tick
+        self._lock = threading.Lock()
+        self._last_tick = clock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __call__(self, event_type, data):
+        if event_type == "order":
+            with self._lock:
+                for item, amount in data["ingredients"].items():
+                    self._used[item] = self._used.get(item, 0) + amount
+        elif event_type == "refill":
+            # A partial refill only re-arms the ingredients it topped up
+            with self._lock:
+                self.due.difference_update(data["levels"])
+
+    def tick(self, now=None):
+        """Updates the rates and emits "refill_due" where needed. Returns the forecasts."""
+        now = self.clock() if now is None else now
+        elapsed = now - self._last_tick
+        if elapsed <= 0:
+            return {}
+        self._last_tick = now
+        with self._lock:
+            used, self._used = self._used, {}
+
+        # Ticks can be uneven, so the decay depends on the time that passed
+        decay = math.exp(-elapsed / self.time_constant)
+        self._weight = decay * self._weight + (1 - decay)
+
+        levels = self.coffee_machine.resources
+        forecasts = {}
+        for item, level in levels.items():
+            rate = used.get(item, 0) / elapsed
+            average = decay * self._averages.get(item, 0.0) + (1 - decay) * rate
+            self._averages[item] = average
+            # Dividing by the weight stops a young average from reading too low
+            smoothed = average / self._weight
+            self.rates[item] = smoothed
+            seconds_left = level / smoothed if smoothed > 0 else float("inf")
+            forecasts[item] = seconds_left
+
+            if seconds_left < self.lead_time and item not in self.due:
+                with self._lock:
+                    self.due.add(item)
+                self.coffee_machine.emit("refill_due", {
+                    "ingredient": item,
+                    "level": level,
+                    "per_minute": round(smoothed * 60, 2),
+                    "seconds_left": round(seconds_left, 1),
+                })
+        return forecasts
+
+    # --- Timer thread ---
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._last_tick = self.clock()
+            self._thread = threading.Thread(target=self._run, name="refill-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.tick()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
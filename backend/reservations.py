@@ -0,0 +1,150 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+
+# How long (seconds) a customer may take to pay before the stock goes back
+DEFAULT_HOLD_TTL = 120
+
+
+class HoldBook:
+    """
+    Keeps ingredients on hold while a customer is paying.
+
+    A hold is confirmed when the payment goes through, cancelled when the
+    customer backs out, or released automatically once its TTL runs out.
+    While the money is being counted the hold is pinned, so it cannot run
+    out between taking the coins and confirming the order.
+    Expiry times sit in a min-heap, so sweep() only looks at holds that
+    have actually expired: O(log n) per released hold instead of
+    scanning every outstanding one.
+    """
+
+    def __init__(self, inventory, default_ttl=DEFAULT_HOLD_TTL, clock=time.monotonic):
+        self.inventory = inventory
+        self.default_ttl = default_ttl
+        self.clock = clock
+
+        self._holds = {}    # hold_id -> (Reservation, expires_at)
+        self._expiry = []   # heap of (expires_at, hold_id)
+        self._pinned = set()  # holds that are being paid for right now
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def hold(self, amounts, ttl=None, label=None):
+        """
+        Returns (hold_id, None) or (None, missing_item).
+        label is stored on the Reservation (e.g. the drink name).
+        Raises ValueError (before anything is reserved) for a bad ttl.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        if isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or not 0 < ttl < math.inf:
+            raise ValueError(f"Hold TTL must be a positive number of seconds, got {ttl!r}")
+
+        # Give back anything that already timed out before checking stock
+        self.sweep()
+
+        expires_at = self.clock() + ttl
+        reservation, missing_item = self.inventory.reserve(amounts)
+        if reservation is None:
+            return None, missing_item
+        reservation.label = label
+
+        with self._lock:
+            hold_id = next(self._ids)
+            self._holds[hold_id] = (reservation, expires_at)
+            heapq.heappush(self._expiry, (expires_at, hold_id))
+        return hold_id, None
+
+    def confirm(self, hold_id):
+        """
+        Makes a hold final and returns its Reservation.
+        Returns None if it was cancelled or has expired.
+        """
+        with self._lock:
+            entry = self._holds.pop(hold_id, None)
+            pinned = hold_id in self._pinned
+            self._pinned.discard(hold_id)
+        if entry is None:
+            return None
+
+        reservation, expires_at = entry
+        if not pinned and self.clock() >= expires_at:
+            # Too late: the sweeper just has not got to it yet
+            self.inventory.rollback(reservation)
+            return None
+
+        self.inventory.commit(reservation)
+        return reservation
+
+    def cancel(self, hold_id):
+        """
+        Puts a hold's ingredients back. Returns False if there was nothing
+        to cancel (or it is being paid for right now).
+        """
+        with self._lock:
+            if hold_id in self._pinned:
+                return False
+            entry = self._holds.pop(hold_id, None)
+        if entry is None:
+            return False
+        self.inventory.rollback(entry[0])
+        return True
+
+    def pin(self, hold_id):
+        """
+        Keeps an active hold from expiring or being cancelled while the
+        customer's money is taken. Returns False if it is gone or has
+        already run out of time. Follow with confirm() or unpin().
+        """
+        with self._lock:
+            entry = self._holds.get(hold_id)
+            if entry is None or hold_id in self._pinned or self.clock() >= entry[1]:
+                return False
+            self._pinned.add(hold_id)
+            return True
+
+    def unpin(self, hold_id):
+        """The payment did not go through: the hold runs out as usual again."""
+        with self._lock:
+            self._pinned.discard(hold_id)
+            entry = self._holds.get(hold_id)
+            if entry is not None:
+                # sweep() may have dropped its heap entry while it was pinned
+                heapq.heappush(self._expiry, (entry[1], hold_id))
+
+    def sweep(self, now=None):
+        """Releases every expired hold and returns how many there were."""
+        now = self.clock() if now is None else now
+        expired = []
+
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expires_at, hold_id = heapq.heappop(self._expiry)
+                entry = self._holds.get(hold_id)
+                # Confirmed/cancelled holds leave a stale heap entry behind,
+                # pinned ones get theirs back from unpin()
+                if entry is not None and entry[1] == expires_at and hold_id not in self._pinned:
+                    del self._holds[hold_id]
+                    expired.append(entry[0])
+
+            # Too many stale entries: rebuild the heap from the live holds
+            if len(self._expiry) > 2 * len(self._holds) + 64:
+                self._expiry = [(expires_at, hold_id) for hold_id, (_, expires_at) in self._holds.items()]
+                heapq.heapify(self._expiry)
+
+        for reservation in expired:
+            self.inventory.rollback(reservation)
+        return len(expired)
+
+    def is_active(self, hold_id):
+        """True while the hold exists and has not run out of time (or is being paid for)."""
+        entry = self._holds.get(hold_id)
+        return entry is not None and (hold_id in self._pinned or self.clock() < entry[1])
+
+    def __contains__(self, hold_id):
+        return hold_id in self._holds
+
+    def __len__(self):
+        return len(self._holds)
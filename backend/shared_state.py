@@ -0,0 +1,483 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import shared_memory
+
+from .inventory import Reservation, check_top_up
+from .money import COIN_NAMES, DENOMINATIONS, coins_value, make_change
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+# Segment layout, all int64 slots:
+#   header     magic, layout version, number of ingredients, length of the names
+#   names      NAME_SLOTS * 8 bytes of "water,milk,coffee" (utf-8)
+#   levels     one per ingredient
+#   capacity   one per ingredient
+#   low_stock  one per ingredient
+#   processes  PROCESS_SLOTS rows of: pid of the attached process (0 = free
+#              row), then what it holds (reserved, not committed) per ingredient
+#   coins      one per denomination (pennies ... dollars)
+SEGMENT_MAGIC = 0x434D5348  # "CMSH"
+LAYOUT_VERSION = 3
+HEADER_SLOTS = 4
+NAME_SLOTS = 32
+PROCESS_SLOTS = 16  # processes that can be attached at the same time
+ATTACH_TIMEOUT = 2.0  # seconds to wait for the creating process to finish the header
+
+
+def open_segment(name, size=0, create=False):
+    """
+    SharedMemory that outlives the process that opened it. Python's
+    resource tracker would otherwise unlink the segment as soon as the
+    first process using it exits; here only unlink() removes it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    except TypeError:  # Python < 3.13 has no 'track'
+        segment = shared_memory.SharedMemory(name=name, create=create, size=size)
+        if os.name == "posix":
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+def process_alive(pid):
+    """Is the process still running? (A reused pid counts as alive.)"""
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # it exists, it just belongs to someone else
+    return True
+
+
+class ProcessLock:
+    """
+    A lock that works across processes AND threads: a threading.Lock for
+    threads of this process plus an OS file lock (fcntl.flock on POSIX,
+    msvcrt.locking on Windows) for other processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        try:
+            if sys.platform == "win32":
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        try:
+            if sys.platform == "win32":
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._thread_lock.release()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def close(self):
+        os.close(self._fd)
+
+
+class SharedMachineState:
+    """
+    Stock levels and coin counts of ONE physical machine, kept in a
+    multiprocessing.shared_memory segment so several processes (kiosk
+    UI, maintenance tool, ...) read and update the same numbers directly,
+    with no messages between them.
+
+    Use create() in one process and attach() everywhere else (or open(),
+    which does whichever is needed). .inventory and .cash_box have the
+    same methods as Inventory and CashBox, so they can be put into a
+    CoffeeMachine with attach_shared_state().
+
+    Every update holds one ProcessLock for a few integer writes. Holds
+    (reserved stock) are deducted from the shared levels and counted in
+    the row of the process that made them; the hold list itself stays in
+    that process. When a process exits or crashes with holds open, the
+    next process to attach or refill gives that stock back (see
+    SharedInventory.reclaim_holds()).
+    """
+
+    def __init__(self, segment, ingredients, lock):
+        self.segment = segment
+        self.ingredients = tuple(ingredients)
+        self.index = {item: i for i, item in enumerate(self.ingredients)}
+        self.lock = lock
+
+        count = len(self.ingredients)
+        self._slots = segment.buf.cast("q")
+        self.levels_at = HEADER_SLOTS + NAME_SLOTS
+        self.capacity_at = self.levels_at + count
+        self.low_stock_at = self.capacity_at + count
+        self.processes_at = self.low_stock_at + count
+        self.row_size = 1 + count
+        self.coins_at = self.processes_at + PROCESS_SLOTS * self.row_size
+
+        self.row_at = self._claim_row()
+        self.inventory = SharedInventory(self)
+        self.cash_box = SharedCashBox(self)
+
+    @staticmethod
+    def segment_size(count):
+        return 8 * (HEADER_SLOTS + NAME_SLOTS + 3 * count + PROCESS_SLOTS * (1 + count) + len(DENOMINATIONS))
+
+    def rows(self):
+        return range(self.processes_at, self.coins_at, self.row_size)
+
+    def _claim_row(self):
+        """Finds a free process row for this process (after freeing those of dead ones)."""
+        slots = self._slots
+        with self.lock:
+            self.reclaim()
+            for row in self.rows():
+                if slots[row] == 0:
+                    slots[row] = os.getpid()
+                    return row
+        slots.release()
+        raise ValueError(f"More than {PROCESS_SLOTS} processes are attached to this shared state")
+
+    def _release_row(self, row):
+        """Puts what a process row holds back into the levels and frees the row. Lock must be held."""
+        slots = self._slots
+        returned = {}
+        for i, item in enumerate(self.ingredients):
+            amount = slots[row + 1 + i]
+            if amount:
+                slots[self.levels_at + i] += amount
+                slots[row + 1 + i] = 0
+                returned[item] = amount
+        slots[row] = 0
+        return returned
+
+    def reclaim(self):
+        """Frees the rows of processes that are gone. Lock must be held. Returns the stock given back."""
+        returned = {}
+        for row in self.rows():
+            pid = self._slots[row]
+            if pid and not process_alive(pid):
+                for item, amount in self._release_row(row).items():
+                    returned[item] = returned.get(item, 0) + amount
+        return returned
+
+    def held(self, i):
+        """Total held of ingredient number i, over all processes. Lock must be held."""
+        slots = self._slots
+        return sum(slots[row + 1 + i] for row in self.rows())
+
+    @staticmethod
+    def lock_path(name):
+        return os.path.join(tempfile.gettempdir(), f"{name}.lock")
+
+    @classmethod
+    def create(cls, name, capacity, low_stock=None, levels=None, coins=None):
+        """Creates the segment with full tanks (or 'levels') and the given coin float."""
+        from .cash_box import DEFAULT_FLOAT
+
+        names = ",".join(capacity).encode("utf-8")
+        if len(names) > NAME_SLOTS * 8:
+            raise ValueError("Too many ingredient names for the shared layout")
+        count = len(capacity)
+        segment = open_segment(name, cls.segment_size(count), create=True)
+
+        slots = segment.buf.cast("q")
+        segment.buf[HEADER_SLOTS * 8:HEADER_SLOTS * 8 + len(names)] = names
+        levels = capacity if levels is None else levels
+        low_stock = low_stock or {}
+        levels_at = HEADER_SLOTS + NAME_SLOTS
+        for i, item in enumerate(capacity):
+            slots[levels_at + i] = levels.get(item, 0)
+            slots[levels_at + count + i] = capacity[item]
+            slots[levels_at + 2 * count + i] = low_stock.get(item, -1)  # -1 = no threshold
+        processes_at = levels_at + 3 * count
+        for position in range(processes_at, processes_at + PROCESS_SLOTS * (1 + count)):
+            slots[position] = 0
+        for i, coin_count in enumerate(DEFAULT_FLOAT if coins is None else coins):
+            slots[processes_at + PROCESS_SLOTS * (1 + count) + i] = coin_count
+        slots[1] = LAYOUT_VERSION
+        slots[2] = count
+        slots[3] = len(names)
+        # Written last: attach() waits for it, so it never sees half a header
+        slots[0] = SEGMENT_MAGIC
+        slots.release()
+        return cls(segment, capacity, ProcessLock(cls.lock_path(name)))
+
+    @classmethod
+    def attach(cls, name, timeout=ATTACH_TIMEOUT):
+        """Opens a segment another process created. Raises FileNotFoundError if there is none."""
+        segment = open_segment(name)
+        header = segment.buf[:HEADER_SLOTS * 8].cast("q")
+        deadline = time.monotonic() + timeout
+        while header[0] != SEGMENT_MAGIC:
+            if time.monotonic() > deadline:
+                header.release()
+                segment.close()
+                raise ValueError(f"Shared segment {name!r} is not a coffee machine state")
+            time.sleep(0.01)
+        if header[1] != LAYOUT_VERSION:
+            version = header[1]
+            header.release()
+            segment.close()
+            raise ValueError(f"Shared segment {name!r} has layout version {version}, expected {LAYOUT_VERSION}")
+        count, names_length = header[2], header[3]
+        header.release()
+
+        start = HEADER_SLOTS * 8
+        names = bytes(segment.buf[start:start + names_length]).decode("utf-8")
+        ingredients = names.split(",") if count else []
+        return cls(segment, ingredients, ProcessLock(cls.lock_path(name)))
+
+    @classmethod
+    def open(cls, name, capacity, low_stock=None):
+        """attach() if the segment exists, otherwise create() it."""
+        try:
+            return cls.attach(name)
+        except FileNotFoundError:
+            pass
+        try:
+            return cls.create(name, capacity, low_stock)
+        except FileExistsError:
+            # Another process created it in the meantime
+            return cls.attach(name)
+
+    def close(self):
+        """
+        Detaches this process (the state stays for the others). Holds it
+        still has open go back into the shared levels.
+        """
+        with self.lock:
+            self._release_row(self.row_at)
+        self._slots.release()
+        self.segment.close()
+        self.lock.close()
+
+    def unlink(self):
+        """Removes the segment for good (call once, when the machine is retired)."""
+        if os.name == "posix" and sys.version_info < (3, 13):
+            # unlink() also unregisters it from the tracker open_segment() took it from
+            from multiprocessing import resource_tracker
+            resource_tracker.register(self.segment._name, "shared_memory")
+        self.segment.unlink()
+        try:
+            os.remove(self.lock_path(self.segment.name))
+        except OSError:
+            pass
+
+
+class SharedInventory:
+    """Inventory (see inventory.py) on top of a SharedMachineState."""
+
+    def __init__(self, state):
+        self.state = state
+        slots = state._slots
+        self.capacity = {item: slots[state.capacity_at + i] for item, i in state.index.items()}
+        self.low_stock = {item: slots[state.low_stock_at + i] for item, i in state.index.items()
+                          if slots[state.low_stock_at + i] >= 0}
+        self.on_low_stock = None
+
+    def reserve(self, amounts):
+        """Takes ALL the amounts or nothing. Returns (Reservation, None) or (None, missing_item)."""
+        state = self.state
+        slots = state._slots
+        positions = [(state.levels_at + state.index[item], item, amount) for item, amount in amounts.items()]
+        held_offset = state.row_at + 1 - state.levels_at  # this process's row
+        crossed = None
+        with state.lock:
+            for position, item, amount in positions:
+                if slots[position] < amount:
+                    return None, item
+            for position, item, amount in positions:
+                level = slots[position] - amount
+                slots[position] = level
+                slots[position + held_offset] += amount
+                threshold = self.low_stock.get(item)
+                if threshold is not None and level < threshold <= level + amount:
+                    crossed = crossed or []
+                    crossed.append((item, level))
+
+        if crossed and self.on_low_stock is not None:
+            for item, level in crossed:
+                self.on_low_stock(item, level)
+        return Reservation(dict(amounts)), None
+
+    def commit(self, reservation):
+        if reservation.state != "held":
+            raise ValueError(f"Reservation is already {reservation.state}")
+        reservation.state = "committed"
+
+        state = self.state
+        with state.lock:
+            for item, amount in reservation.amounts.items():
+                state._slots[state.row_at + 1 + state.index[item]] -= amount
+
+    def rollback(self, reservation):
+        if reservation.state != "held":
+            raise ValueError(f"Reservation is already {reservation.state}")
+        reservation.state = "rolled_back"
+        state = self.state
+        slots = state._slots
+        with state.lock:
+            for item, amount in reservation.amounts.items():
+                slots[state.levels_at + state.index[item]] += amount
+                slots[state.row_at + 1 + state.index[item]] -= amount
+
+    def take(self, amounts):
+        reservation, missing_item = self.reserve(amounts)
+        if reservation is None:
+            return False, missing_item
+        self.commit(reservation)
+        return True, None
+
+    def top_up(self, amounts):
+        check_top_up(amounts)
+        state = self.state
+        slots = state._slots
+        levels = {}
+        with state.lock:
+            state.reclaim()
+            for item, amount in amounts.items():
+                position = state.levels_at + state.index[item]
+                held = state.held(state.index[item])
+                # Held stock is still in the tank: leave room for it
+                level = min(slots[position] + amount, self.capacity[item] - held)
+                slots[position] = level
+                levels[item] = level + held
+        return levels
+
+    def fill(self, items=None):
+        items = self.capacity if items is None else items
+        state = self.state
+        slots = state._slots
+        levels = {}
+        with state.lock:
+            # Holds of processes that are gone would otherwise stay held forever
+            state.reclaim()
+            for item in items:
+                held = state.held(state.index[item])
+                slots[state.levels_at + state.index[item]] = self.capacity[item] - held
+                levels[item] = self.capacity[item]
+        return levels
+
+    def set_levels(self, levels):
+        state = self.state
+        with state.lock:
+            for item, level in levels.items():
+                state._slots[state.levels_at + state.index[item]] = level
+        return dict(levels)
+
+    def snapshot(self):
+        state = self.state
+        with state.lock:
+            return {item: state._slots[state.levels_at + i] for item, i in state.index.items()}
+
+    def stock(self):
+        state = self.state
+        slots = state._slots
+        with state.lock:
+            return {item: slots[state.levels_at + i] + state.held(i) for item, i in state.index.items()}
+
+    def reclaim_holds(self):
+        """
+        Gives back the stock held by processes that exited or crashed
+        without cancelling their holds. Runs by itself on attach, fill()
+        and top_up(); returns {ingredient: amount given back}.
+        """
+        with self.state.lock:
+            return self.state.reclaim()
+
+    async def reserve_async(self, amounts):
+        return await asyncio.to_thread(self.reserve, amounts)
+
+    async def rollback_async(self, reservation):
+        return await asyncio.to_thread(self.rollback, reservation)
+
+
+class SharedCashBox:
+    """CashBox (see cash_box.py) on top of a SharedMachineState."""
+
+    def __init__(self, state):
+        self.state = state
+        self._range = range(state.coins_at, state.coins_at + len(DENOMINATIONS))
+
+    def _read(self):
+        slots = self.state._slots
+        return tuple(slots[position] for position in self._range)
+
+    def snapshot(self):
+        with self.state.lock:
+            return self._read()
+
+    def as_dict(self):
+        return dict(zip(COIN_NAMES, self.snapshot()))
+
+    def total(self):
+        return coins_value(self.snapshot())
+
+    def can_make_change(self, amount):
+        return make_change(amount, self.snapshot()) is not None
+
+    def settle(self, inserted, change):
+        slots = self.state._slots
+        with self.state.lock:
+            after_deposit = tuple(held + given for held, given in zip(self._read(), inserted))
+            coins = make_change(change, after_deposit)
+            if coins is None:
+                return None
+            for position, count in zip(self._range, after_deposit):
+                slots[position] = count
+            for position, returned in zip(self._range, coins):
+                slots[position] -= returned
+        return coins
+
+    def deposit(self, counts):
+        slots = self.state._slots
+        with self.state.lock:
+            for position, count in zip(self._range, counts):
+                slots[position] += count
+
+    def withdraw(self, counts):
+        slots = self.state._slots
+        with self.state.lock:
+            if any(count > held for held, count in zip(self._read(), counts)):
+                return False
+            for position, count in zip(self._range, counts):
+                slots[position] -= count
+        return True
+
+    def set_counts(self, counts):
+        slots = self.state._slots
+        with self.state.lock:
+            for position, count in zip(self._range, counts):
+                slots[position] = count
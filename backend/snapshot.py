@@ -0,0 +1,207 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+from .money import DENOMINATIONS
+from .journal import last_sequence, replay
+
+# Take a snapshot after this many journaled events
+DEFAULT_SNAPSHOT_EVERY = 1000
+
+# File layout (little endian):
+#   header   magic, format version, last seq, journal offset, menu version,
+#            number of ingredients, length of the ingredient names
+#   names    "water,milk,coffee" (utf-8)
+#   levels   one int64 per ingredient
+#   coins    one int64 per denomination (pennies ... dollars)
+#   crc32    of everything above
+SNAPSHOT_MAGIC = b"CMSS"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<4sHQQ8sHH")
+CRC = struct.Struct("<I")
+
+
+def menu_version(menu):
+    """Short fingerprint of a menu, so a snapshot shows which menu it was taken with."""
+    text = json.dumps(menu, sort_keys=True)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+def pack_snapshot(levels, coins, last_seq, journal_offset, menu_hash):
+    names = ",".join(levels).encode("utf-8")
+    body = [
+        HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, last_seq, journal_offset, menu_hash,
+                    len(levels), len(names)),
+        names,
+        struct.pack(f"<{len(levels)}q", *levels.values()),
+        struct.pack(f"<{len(DENOMINATIONS)}q", *coins),
+    ]
+    data = b"".join(body)
+    return data + CRC.pack(zlib.crc32(data))
+
+
+def write_snapshot(path, data):
+    """Writes the snapshot atomically: a crash leaves either the old or the new file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path):
+    """
+    Memory-maps a snapshot file and returns a dict with 'levels', 'coins',
+    'last_seq', 'journal_offset' and 'menu_version', or None if there is
+    no usable snapshot (missing, empty, damaged or another version).
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        try:
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return None
+        with view:
+            if len(view) < HEADER.size + CRC.size:
+                return None
+            end = len(view) - CRC.size
+            if zlib.crc32(view[:end]) != CRC.unpack_from(view, end)[0]:
+                return None
+            magic, version, last_seq, journal_offset, menu_hash, count, names_length = \
+                HEADER.unpack_from(view, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                return None
+
+            position = HEADER.size
+            names = view[position:position + names_length].decode("utf-8").split(",") if count else []
+            position += names_length
+            levels = struct.unpack_from(f"<{count}q", view, position)
+            position += 8 * count
+            coins = struct.unpack_from(f"<{len(DENOMINATIONS)}q", view, position)
+
+    return {
+        "levels": dict(zip(names, levels)),
+        "coins": coins,
+        "last_seq": last_seq,
+        "journal_offset": journal_offset,
+        "menu_version": menu_hash,
+    }
+
+
+def recover(coffee_machine, journal_path, snapshot_path=None):
+    """
+    Brings a machine back to where it was before a restart or crash:
+    loads the latest snapshot (if any), then replays only the journal
+    events written after it. Returns a dict describing what was done.
+    """
+    snapshot = load_snapshot(snapshot_path) if snapshot_path else None
+    offset = 0
+    after_seq = 0
+    if snapshot is not None:
+        # A snapshot newer than the journal means the journal was replaced
+        # or truncated; its offset would point at the wrong records
+        if snapshot["last_seq"] <= last_sequence(journal_path):
+            offset = snapshot["journal_offset"]
+        after_seq = snapshot["last_seq"]
+        # Ingredients dropped from the machine config since the snapshot are ignored
+        capacity = coffee_machine.inventory.capacity
+        coffee_machine.inventory.set_levels({item: level for item, level in snapshot["levels"].items()
+                                             if item in capacity})
+        coffee_machine.cash_box.set_counts(snapshot["coins"])
+
+    replayed, last_seq = replay(coffee_machine, journal_path, offset, after_seq)
+    return {
+        "snapshot_seq": snapshot["last_seq"] if snapshot else None,
+        "menu_changed": snapshot is not None and snapshot["menu_version"] != menu_version(coffee_machine.MENU),
+        "replayed": replayed,
+        "last_seq": last_seq,
+    }
+
+
+class Snapshotter:
+    """
+    CoffeeMachine listener that saves a snapshot every 'every' events.
+
+    Subscribe it after the Journal: the state is captured in the thread
+    that emitted the event (a few dict/tuple copies), and the file is
+    written by a background thread once the journal has flushed that far,
+    so a snapshot never claims events the journal does not have yet.
+
+    Events come from several threads (orders, the refill scheduler's
+    timer, ...). Every journaled change is made together with its event
+    under the machine's state_lock, and take() captures the state and the
+    journal position under the same lock, so the two always match.
+    """
+
+    def __init__(self, coffee_machine, journal, path, every=DEFAULT_SNAPSHOT_EVERY):
+        self.coffee_machine = coffee_machine
+        self.journal = journal
+        self.path = path
+        self.every = every
+        self.written = 0  # snapshots saved so far
+        self._since_last = 0
+        self._menu_version = menu_version(coffee_machine.MENU)
+        self._cond = threading.Condition()
+        self._pending = None
+        self._writing = False
+
+    def __call__(self, event_type, data):
+        with self.coffee_machine.state_lock:
+            self._since_last += 1
+            if self._since_last >= self.every:
+                self.take()
+
+    def take(self):
+        """Captures the current state and hands it to the writer thread."""
+        cm = self.coffee_machine
+        with cm.state_lock:
+            self._since_last = 0
+            last_seq, journal_offset = self.journal.position()
+            # Held drinks are still in the tanks: the journal only has an order
+            # for them once they are paid, and replay takes it out then
+            state = (cm.inventory.stock(), cm.cash_box.snapshot(), last_seq, journal_offset)
+        with self._cond:
+            self._pending = state
+            if self._writing:
+                return  # the running writer picks up the newest state
+            self._writing = True
+        threading.Thread(target=self._write_pending, name="snapshot-writer", daemon=True).start()
+
+    def _write_pending(self):
+        while True:
+            with self._cond:
+                state, self._pending = self._pending, None
+                if state is None:
+                    self._writing = False
+                    self._cond.notify_all()
+                    return
+            levels, coins, last_seq, journal_offset = state
+            try:
+                self.journal.flush()
+            except OSError:
+                # The journal stopped writing, so it may not reach last_seq:
+                # a snapshot pointing past it would skip events on replay
+                with self._cond:
+                    self._pending = None
+                    self._writing = False
+                    self._cond.notify_all()
+                return
+            write_snapshot(self.path, pack_snapshot(levels, coins, last_seq, journal_offset,
+                                                    self._menu_version))
+            self.written += 1
+
+    def wait(self, timeout=None):
+        """Blocks until no snapshot is being written (for benchmarks and shutdown)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._writing, timeout)
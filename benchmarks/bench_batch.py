@@ -0,0 +1,84 @@
+"""
+Batch capacity planning vs. looping verify_resources.
+
+Builds a random fleet and a random order queue, then answers "can every
+machine serve its queue, and what is left?" twice: once with one call
+to backend.batch.evaluate_orders and once by replaying every order
+through verify_resources on real CoffeeMachine objects.
+
+    python benchmarks/bench_batch.py --machines 500 --orders 20000
+"""
+import argparse
+import time
+
+import numpy as np
+
+import common  # noqa: F401  (sets up sys.path)
+from backend.batch import evaluate_orders, inventory_matrix, order_counts, recipe_matrix
+from backend.logic import CoffeeMachine, verify_resources
+
+
+def build_fleet(n_machines, rng):
+    machines = []
+    for _ in range(n_machines):
+        machine = CoffeeMachine()
+        machine.inventory.set_levels({
+            "water": int(rng.integers(1000, 20000)),
+            "milk": int(rng.integers(500, 10000)),
+            "coffee": int(rng.integers(200, 5000)),
+        })
+        machines.append(machine)
+    return machines
+
+
+def loop_evaluate(machines, machine_ids, drink_ids, drink_names):
+    feasible = [True] * len(machines)
+    for machine_id, drink_id in zip(machine_ids, drink_ids):
+        ok, _ = verify_resources(drink_names[drink_id], machines[machine_id])
+        if not ok:
+            feasible[machine_id] = False
+    return feasible
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--machines", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    machines = build_fleet(args.machines, rng)
+    drink_names, ingredients, recipes = recipe_matrix(machines[0].MENU)
+
+    machine_ids = rng.integers(0, args.machines, args.orders)
+    drink_ids = rng.integers(0, len(drink_names), args.orders)
+
+    started = time.perf_counter()
+    inventories = inventory_matrix(machines, ingredients)
+    counts = order_counts(machine_ids, drink_ids, args.machines, len(drink_names))
+    result = evaluate_orders(inventories, counts, recipes)
+    batch_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    loop_feasible = loop_evaluate(machines, machine_ids, drink_ids, drink_names)
+    loop_s = time.perf_counter() - started
+
+    # Both must agree on which machines can serve their whole queue
+    assert list(result.feasible) == loop_feasible
+
+    print(f"machines={args.machines} orders={args.orders}")
+    print(f"batch:  {batch_s * 1000:9.2f} ms")
+    print(f"loop:   {loop_s * 1000:9.2f} ms   ({loop_s / batch_s:.1f}x slower)")
+    print(f"feasible machines: {int(result.feasible.sum())}/{args.machines}")
+
+    if args.output:
+        common.write_results(args.output, "batch_capacity", {
+            "machines": args.machines, "orders": args.orders,
+            "batch_ms": round(batch_s * 1000, 3), "loop_ms": round(loop_s * 1000, 3),
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Fleet simulation scaling benchmark.
+
+Simulates the same fleet (every machine has its own seeded Poisson
+customer stream) with 1, 2, 4, ... worker processes and reports wall
+time, simulated customers per second, speedup and parallel efficiency.
+The fleet totals must come out identical for every worker count.
+
+Even the 1-worker run uses a child process, so every run starts with
+the same cold caches (make_change's memo is per process).
+
+    python benchmarks/bench_fleet.py --machines 2000 --hours 8 --workers 1 2 4 8 --output fleet.json
+"""
+import argparse
+import os
+import sys
+import time
+
+import common
+from bench_orders import parse_mix
+from bench_refill import DEFAULT_CAPACITY, parse_levels
+from backend.fleet import run_fleet
+
+
+def default_workers():
+    workers = [1]
+    while workers[-1] * 2 <= (os.cpu_count() or 1):
+        workers.append(workers[-1] * 2)
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--machines", type=int, default=2000)
+    parser.add_argument("--hours", type=float, default=8)
+    parser.add_argument("--per-minute", type=float, default=0.5, help="average customers per machine per minute")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers(),
+                        help="process counts to try (default: 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--capacity", default=DEFAULT_CAPACITY, help="tank sizes, e.g. water=5000,milk=3000")
+    parser.add_argument("--mix", help="drink weights, e.g. espresso=5,latte=3 (default: even)")
+    parser.add_argument("--refill-minutes", type=float, default=15, help="operator response time")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    config = {"capacity": parse_levels(args.capacity), "low_stock": {}}
+    mix = parse_mix(args.mix) if args.mix else None
+
+    runs = []
+    reference = None
+    print(f"{'workers':>7} {'seconds':>8} {'customers/s':>12} {'speedup':>8} {'efficiency':>10}")
+    for workers in args.workers:
+        started = time.perf_counter()
+        fleet = run_fleet(args.machines, args.hours, args.per_minute, workers=workers, config=config,
+                          refill_delay=args.refill_minutes * 60, mix=mix)
+        elapsed = time.perf_counter() - started
+
+        served_per_machine = fleet.pop("served_per_machine")
+        if reference is None:
+            reference = (elapsed, fleet)
+        elif fleet != reference[1]:
+            sys.exit(f"Fleet totals differ with {workers} workers: {fleet} vs {reference[1]}")
+
+        speedup = reference[0] / elapsed
+        run = {
+            "workers": workers,
+            "seconds": round(elapsed, 3),
+            "customers_per_sec": round(fleet["customers"] / elapsed),
+            "speedup": round(speedup, 2),
+            # Relative to the first worker count (normally 1)
+            "efficiency": round(speedup / (workers / args.workers[0]) * 100, 1),
+        }
+        runs.append(run)
+        print(f"{workers:>7} {run['seconds']:>8} {run['customers_per_sec']:>12,} {run['speedup']:>8} "
+              f"{run['efficiency']:>9}%")
+
+    fleet = reference[1]
+    served_per_machine.sort()
+    print(f"Fleet: {fleet['customers']:,} customers, {fleet['served']:,} served, "
+          f"{fleet['stockouts']:,} stockouts, {fleet['change_failures']:,} change failures, "
+          f"${fleet['revenue_cents'] / 100:,.2f} revenue")
+    if (os.cpu_count() or 1) < max(args.workers):
+        print(f"Note: only {os.cpu_count()} CPU(s) here, so more workers cannot run in parallel.")
+
+    if args.output:
+        common.write_results(args.output, "fleet_scaling", {
+            "machines": args.machines, "hours": args.hours, "per_minute": args.per_minute,
+            "fleet": fleet,
+            "served_per_machine": {
+                "p5": common.percentile(served_per_machine, 5),
+                "p50": common.percentile(served_per_machine, 50),
+                "p95": common.percentile(served_per_machine, 95),
+            },
+            "runs": runs,
+        })
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Frame latency of the Tk GUI while orders are being processed.
+
+A 16 ms heartbeat runs with after() and records how late every beat
+fires while scripted customers go through the whole order flow
+(Order -> Payment -> Brewing -> Change -> Drink). This runs twice:
+
+    blocking   payment and brewing on the Tk thread (pipeline workers=0)
+    pipeline   payment and brewing on the order worker thread
+
+--backend-ms adds that much delay to every payment, standing in for
+slow persistence or cash-box hardware. Brewing uses the simulated
+hardware (backend/hardware.py), sped up by --time-scale.
+
+    python benchmarks/bench_frame_latency.py --orders 20 --time-scale 0.02 --backend-ms 200 --output frames.json
+
+Needs Xvfb on Linux when DISPLAY is not set (apt install xvfb).
+"""
+import argparse
+import sys
+import time
+
+import common
+from bench_gui import start_virtual_display, summarize
+
+FRAME_MS = 16   # heartbeat period (about 60 frames per second)
+CLICK_MS = 50   # how often the scripted customer looks at the screen
+JANK_MS = 50    # a beat this late is a visible stutter
+
+DRINKS = ["espresso", "latte", "cappuccino"]
+
+
+def slowed(stage, delay):
+    """stage() with 'delay' seconds of extra backend work in front of it."""
+    def run(*args):
+        time.sleep(delay)
+        return stage(*args)
+    return run
+
+
+def run(workers, orders, backend_ms):
+    from backend import machine
+    from backend.cash_box import DEFAULT_FLOAT
+    import gui.gui_code as gui_code
+    from gui.gui_code import CoffeeApp, StartPage, OrderPage, PaymentPage, GiveChangePage, GiveDrinkPage
+
+    original_take_payment = gui_code.take_payment
+    gui_code.take_payment = slowed(original_take_payment, backend_ms / 1000)
+    app = CoffeeApp(run_mainloop=False, cache_dir=None, pipeline_workers=workers)
+
+    lateness = []
+    order_seconds = []
+    state = {"expected": None, "done": 0, "order_started": None}
+
+    def beat():
+        now = time.perf_counter()
+        if state["expected"] is not None:
+            lateness.append(max(0.0, now - state["expected"]))
+        state["expected"] = now + FRAME_MS / 1000
+        app.after(FRAME_MS, beat)
+
+    def click():
+        # Acts like a customer: one tap on whatever screen is up
+        page = app.current_page
+        if isinstance(page, StartPage):
+            app.show_order_screen()
+        elif isinstance(page, OrderPage) and not page.waiting:
+            state["order_started"] = time.perf_counter()
+            machine.refill()
+            machine.cash_box.set_counts(DEFAULT_FLOAT)
+            page.select_drink(DRINKS[state["done"] % len(DRINKS)])
+        elif isinstance(page, PaymentPage) and not page.waiting:
+            page.dollars.set(4)
+            page.pay()
+        elif isinstance(page, GiveChangePage):
+            app.show_delivery_screen()
+        elif isinstance(page, GiveDrinkPage):
+            order_seconds.append(time.perf_counter() - state["order_started"])
+            state["done"] += 1
+            if state["done"] >= orders:
+                app.quit()
+                return
+            app.show_order_screen()
+        # BrewingPage moves on by itself
+        app.after(CLICK_MS, click)
+
+    app.after(FRAME_MS, beat)
+    app.after(CLICK_MS, click)
+    started = time.perf_counter()
+    app.mainloop()
+    elapsed = time.perf_counter() - started
+    app.destroy()
+    gui_code.take_payment = original_take_payment
+
+    frames = summarize(lateness)
+    frames["janky"] = sum(1 for late in lateness if late * 1000 >= JANK_MS)
+    return {
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "orders_per_min": round(orders / elapsed * 60, 1),
+        "order_seconds": summarize(order_seconds),
+        "frame_lateness": frames,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=20)
+    parser.add_argument("--time-scale", type=float, default=0.02,
+                        help="hardware speed-up (0.02 = a 35 s espresso brews in 0.7 s)")
+    parser.add_argument("--backend-ms", type=float, default=200, help="extra delay added to every payment")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    from backend import machine
+    machine.hardware.time_scale = args.time_scale
+
+    xvfb = start_virtual_display()
+    try:
+        runs = {
+            "blocking": run(0, args.orders, args.backend_ms),
+            "pipeline": run(1, args.orders, args.backend_ms),
+        }
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    print(f"{'mode':>9} {'orders/min':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'janky':>6}")
+    for mode, result in runs.items():
+        frames = result["frame_lateness"]
+        print(f"{mode:>9} {result['orders_per_min']:>10} {frames['p50_ms']:>8} {frames['p95_ms']:>8} "
+              f"{frames['max_ms']:>8} {frames['janky']:>6}")
+    print(f"(frame lateness = how late a {FRAME_MS} ms heartbeat fired; janky = {JANK_MS} ms or more)")
+
+    if args.output:
+        common.write_results(args.output, "frame_latency", {
+            "orders": args.orders, "time_scale": args.time_scale, "backend_ms": args.backend_ms,
+            "runs": runs,
+        })
+
+
+if __name__ == "__main__":
+    sys.exit(main())
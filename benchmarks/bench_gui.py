@@ -0,0 +1,164 @@
+"""
+Screen transition benchmark for the Tk GUI.
+
+Starts CoffeeApp without its blocking mainloop (under Xvfb if there is
+no display), scripts the full order flow
+
+    Start -> Order -> Payment -> Brewing -> Change -> Drink
+
+N times through the real page callbacks, and reports per-transition
+latency (first visit vs. warm), live Tk object counts and RSS growth.
+
+    python benchmarks/bench_gui.py --rounds 200 --output gui.json
+
+Soak test for memory creep (samples MemoryProbe every 1000 orders):
+
+    python benchmarks/bench_gui.py --rounds 100000 --sample-every 1000 --output soak.json
+
+Needs Xvfb on Linux when DISPLAY is not set (apt install xvfb).
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import common
+
+# Drinks cycle so every GiveDrinkPage background is exercised
+DRINKS = ["espresso", "latte", "cappuccino"]
+
+
+def start_virtual_display(display=":99"):
+    """Starts Xvfb if we are on a headless machine. Returns the process (or None)."""
+    if os.environ.get("DISPLAY") or sys.platform == "win32" or sys.platform == "darwin":
+        return None
+    if shutil.which("Xvfb") is None:
+        sys.exit("No DISPLAY and Xvfb is not installed (apt install xvfb).")
+
+    proc = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = display
+    time.sleep(0.5)  # give the server a moment to accept connections
+    if proc.poll() is not None:
+        sys.exit(f"Xvfb failed to start on {display}")
+    return proc
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "p50_ms": round(common.percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(common.percentile(samples, 95) * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3) if samples else 0.0,
+    }
+
+
+# Counters that must not grow with the number of orders
+FLAT_COUNTERS = ["widgets", "tk_images", "photoimage_objects", "tcl_commands", "after_callbacks", "canvas_items"]
+
+
+def growth(first, last):
+    return {name: last[name] - first[name] for name in FLAT_COUNTERS}
+
+
+def run(rounds, use_disk_cache, sample_every):
+    from backend import machine
+    from backend.cash_box import DEFAULT_FLOAT
+    from gui.asset_cache import default_cache_dir
+    from gui.gui_code import CoffeeApp, OrderPage, PaymentPage
+
+    # Blocking pipeline and instant brewing: every scripted step has
+    # finished (and its page is up) by the time the action returns
+    machine.hardware.time_scale = 0
+    app = CoffeeApp(run_mainloop=False, cache_dir=default_cache_dir if use_disk_cache else None,
+                    pipeline_workers=0)
+    probe = app.memory_probe
+    app.update()
+
+    first = {}
+    warm = {}
+
+    def timed(name, action, is_first):
+        started = time.perf_counter()
+        action()
+        app.update()  # include layout + paint, like the user would see it
+        elapsed = time.perf_counter() - started
+        if is_first and name not in first:
+            first[name] = round(elapsed * 1000, 3)
+        else:
+            warm.setdefault(name, []).append(elapsed)
+
+    def pay_four_dollars():
+        # Always overpay so the change screen is shown
+        page = app.frames[PaymentPage]
+        page.dollars.set(4)
+        page.pay()
+
+    memory_samples = []
+
+    for number in range(rounds):
+        # Keep the machine stocked so every round completes the whole flow
+        machine.refill()
+        machine.cash_box.set_counts(DEFAULT_FLOAT)
+        drink = DRINKS[number % len(DRINKS)]
+
+        timed("start", app.show_start_screen, number == 0)
+        timed("order", app.show_order_screen, number == 0)
+        timed("payment", lambda: app.frames[OrderPage].select_drink(drink), number == 0)
+        timed("change", pay_four_dollars, number == 0)  # via the brewing screen
+        timed("drink", app.show_delivery_screen, number == 0)
+
+        # Round 1 builds every page, so it is the baseline for growth
+        if number == 0 or (sample_every and (number + 1) % sample_every == 0):
+            sample = probe.sample()
+            sample["orders"] = number + 1
+            memory_samples.append(sample)
+
+    memory_samples.append(dict(probe.sample(), orders=rounds))
+    results = {
+        "rounds": rounds,
+        "disk_cache": use_disk_cache,
+        "first_visit_ms": first,
+        "warm": {name: summarize(samples) for name, samples in warm.items()},
+        "after_first_round": memory_samples[0],
+        "at_end": memory_samples[-1],
+        "growth_after_first_round": growth(memory_samples[0], memory_samples[-1]),
+        "memory_samples": memory_samples,
+        "asset_cache": {"hits": app.assets.hits, "misses": app.assets.misses, "entries": len(app.assets)},
+    }
+    app.destroy()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--disk-cache", action="store_true", help="use the on-disk frame cache")
+    parser.add_argument("--sample-every", type=int, default=0, help="take a memory sample every N orders")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    xvfb = start_virtual_display()
+    try:
+        results = run(args.rounds, args.disk_cache, args.sample_every)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    print("First visit (ms):", results["first_visit_ms"])
+    print(f"{'screen':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name, stats in results["warm"].items():
+        print(f"{name:>8} {stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['max_ms']:>8}")
+    print("Growth after round 1:", results["growth_after_first_round"])
+    if results["at_end"]["rss_kb"] is not None:
+        print(f"RSS: {results['after_first_round']['rss_kb']} KB -> {results['at_end']['rss_kb']} KB")
+
+    if args.output:
+        common.write_results(args.output, "gui_transitions", results)
+
+
+if __name__ == "__main__":
+    main()
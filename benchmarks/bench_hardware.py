@@ -0,0 +1,87 @@
+"""
+Brewing throughput on the simulated hardware (backend/hardware.py).
+
+Feeds the same customers (Poisson arrivals, weighted drink mix) through
+the grinder -> boiler -> frother -> dispenser stations twice:
+
+  one_at_a_time   the next order starts when the last drink is poured
+  pipelined       each station takes the next order as soon as it is free
+
+and reports drinks per hour, how long customers wait in line, and how
+busy each station was. --per-minute 0 puts every order in line at once,
+which measures the most the machine can make per hour.
+
+    python benchmarks/bench_hardware.py --hours 4 --per-minute 1.2 --output hardware.json
+    python benchmarks/bench_hardware.py --orders 500 --per-minute 0 --config machine.json
+"""
+import argparse
+import random
+import sys
+
+import common
+from bench_orders import DEFAULT_MIX, parse_mix
+from bench_refill import customer_arrivals
+from backend.config import load_config
+from backend.hardware import load_stations, route, simulate_orders, throughput_report
+from backend.logic import CoffeeMachine
+from backend.menu import load_menu
+
+
+def queued_orders(count, mix, seed):
+    """'count' orders that are all waiting at time 0."""
+    rng = random.Random(seed)
+    drinks, weights = zip(*mix.items())
+    return [(0.0, rng.choices(drinks, weights)[0]) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=4)
+    parser.add_argument("--per-minute", type=float, default=1.2,
+                        help="average customers per minute (0 = all --orders queued at once)")
+    parser.add_argument("--orders", type=int, default=300, help="orders to queue when --per-minute is 0")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="drink weights, e.g. espresso=5,latte=3")
+    parser.add_argument("--config", help="machine config (JSON) with a \"hardware\" section")
+    parser.add_argument("--menu", help="menu file (JSON) instead of the built-in menu")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    config = load_config(args.config) if args.config else None
+    machine = CoffeeMachine(config)
+    if args.menu:
+        machine.set_menu(load_menu(args.menu))
+    stations = load_stations((config or {}).get("hardware"))
+    mix = parse_mix(args.mix)
+
+    if args.per_minute > 0:
+        orders = customer_arrivals(args.hours, args.per_minute, mix, args.seed)
+    else:
+        orders = queued_orders(args.orders, mix, args.seed)
+
+    print("Seconds per station:")
+    for name in mix:
+        steps = route(machine.menu.recipe(name), stations)
+        print(f"  {name:>12}: " + ", ".join(f"{station} {seconds:.1f}" for station, seconds in steps))
+
+    runs = {}
+    for mode, max_in_progress in (("one_at_a_time", 1), ("pipelined", None)):
+        records, busy_seconds = simulate_orders(orders, machine.menu, stations, max_in_progress)
+        runs[mode] = throughput_report(records, busy_seconds, stations)
+
+    print(f"{len(orders)} orders")
+    print(f"{'mode':>14} {'drinks/h':>9} {'wait p50 s':>11} {'wait p95 s':>11} {'order p95 s':>12}  busiest station")
+    for mode, report in runs.items():
+        busiest = max(report["utilisation"].items(), key=lambda item: item[1])
+        print(f"{mode:>14} {report['drinks_per_hour']:>9} {report['wait']['p50']:>11} {report['wait']['p95']:>11} "
+              f"{report['total']['p95']:>12}  {busiest[0]} {busiest[1]:.0%}")
+
+    if args.output:
+        common.write_results(args.output, "hardware_throughput", {
+            "orders": len(orders), "per_minute": args.per_minute, "mix": mix, "stations": stations,
+            "runs": runs,
+        })
+
+
+if __name__ == "__main__":
+    sys.exit(main())
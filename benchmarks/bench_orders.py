@@ -0,0 +1,213 @@
+"""
+Throughput benchmark for the order pipeline (verify_resources ->
+process_payment, with periodic refill()).
+
+Each order picks a drink from a weighted mix, pays with one of several
+payment styles and is timed end to end. Runs single-threaded, on a
+thread pool sharing one machine, or on a process pool with one machine
+per process, and reports orders/sec, p50/p99 latency and memory
+allocated per order.
+
+    python benchmarks/bench_orders.py --orders 50000 --modes single thread process --output orders.json
+    python benchmarks/bench_orders.py --compare orders.json      # rerun and diff against an older run
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import common
+from backend.logic import CoffeeMachine, process_payment, verify_resources
+from backend.money import DENOMINATIONS, to_cents
+
+DEFAULT_MIX = "espresso=5,latte=3,cappuccino=2"
+
+# How customers pay: (name, weight). See pay_with() for what each one means.
+PAYMENT_STYLES = [("exact", 4), ("dollars", 4), ("coins", 2)]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def pay_with(style, cost_cents, rng):
+    """Returns (pennies, nickels, dimes, quarters, dollars) that cover cost_cents."""
+    if style == "exact":
+        dollars, rest = divmod(cost_cents, 100)
+        quarters, rest = divmod(rest, 25)
+        dimes, rest = divmod(rest, 10)
+        nickels, pennies = divmod(rest, 5)
+        return pennies, nickels, dimes, quarters, dollars
+    if style == "dollars":
+        return 0, 0, 0, 0, -(-cost_cents // 100)
+    # A random handful of coins, topped up with quarters
+    counts = [rng.randint(0, 4) for _ in DENOMINATIONS[:-1]] + [0]
+    paid = sum(c * v for c, v in zip(counts, DENOMINATIONS))
+    if paid < cost_cents:
+        counts[3] += -(-(cost_cents - paid) // 25)
+    return tuple(counts)
+
+
+def run_orders(machine, orders, mix, refill_every, seed, trace_memory=False):
+    """Runs one worker's share of orders. Returns (latencies, counters, peak_bytes)."""
+    rng = random.Random(seed)
+    drinks, weights = zip(*mix.items())
+    styles, style_weights = zip(*PAYMENT_STYLES)
+    costs = {name: machine.MENU[name]["cost"] for name in drinks}
+
+    latencies = []
+    counters = {"served": 0, "out_of_stock": 0, "no_change": 0, "refills": 0}
+    peak_bytes = 0
+
+    for number in range(orders):
+        if refill_every and number % refill_every == 0:
+            machine.refill()
+            counters["refills"] += 1
+
+        drink = rng.choices(drinks, weights)[0]
+        coins = pay_with(rng.choices(styles, style_weights)[0], to_cents(costs[drink]), rng)
+
+        if trace_memory:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+
+        started = time.perf_counter()
+        ok, _ = verify_resources(drink, machine)
+        if ok:
+            paid, change, _ = process_payment(costs[drink], *coins, coffee_machine=machine)
+            if paid:
+                counters["served"] += 1
+            else:
+                counters["no_change"] += 1
+        else:
+            counters["out_of_stock"] += 1
+            # Out of stock is the signal a real operator would refill on
+            machine.refill()
+            counters["refills"] += 1
+        latencies.append(time.perf_counter() - started)
+
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes += peak - before
+
+    return latencies, counters, peak_bytes
+
+
+def _process_worker(args):
+    orders, mix, refill_every, seed = args
+    return run_orders(CoffeeMachine(), orders, mix, refill_every, seed)
+
+
+def summarize(mode, workers, elapsed, per_worker):
+    latencies = sorted(lat for result in per_worker for lat in result[0])
+    counters = {}
+    for _, worker_counters, _ in per_worker:
+        for key, value in worker_counters.items():
+            counters[key] = counters.get(key, 0) + value
+    return {
+        "mode": mode,
+        "workers": workers,
+        "orders": len(latencies),
+        "orders_per_sec": round(len(latencies) / elapsed),
+        "p50_us": round(common.percentile(latencies, 50) * 1e6, 2),
+        "p99_us": round(common.percentile(latencies, 99) * 1e6, 2),
+        **counters,
+    }
+
+
+def run_mode(mode, workers, orders, mix, refill_every):
+    per_worker_orders = orders // workers
+    started = time.perf_counter()
+
+    if mode == "single":
+        per_worker = [run_orders(CoffeeMachine(), orders, mix, refill_every, 0)]
+        workers = 1
+    elif mode == "thread":
+        # All threads hammer the SAME machine, like concurrent kiosks would
+        machine = CoffeeMachine()
+        per_worker = [None] * workers
+
+        def work(i):
+            per_worker[i] = run_orders(machine, per_worker_orders, mix, refill_every, i)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [(per_worker_orders, mix, refill_every, i) for i in range(workers)]
+            per_worker = list(pool.map(_process_worker, jobs))
+
+    return summarize(mode, workers, time.perf_counter() - started, per_worker)
+
+
+def measure_allocations(orders, mix, refill_every):
+    """Separate (slow) pass under tracemalloc: peak bytes allocated per order."""
+    tracemalloc.start()
+    try:
+        _, _, peak_bytes = run_orders(CoffeeMachine(), orders, mix, refill_every, 0, trace_memory=True)
+    finally:
+        tracemalloc.stop()
+    return round(peak_bytes / orders, 1)
+
+
+def compare(old_path, new_results):
+    with open(old_path) as f:
+        old = {(r["mode"], r["workers"]): r for r in json.load(f)["results"]["runs"]}
+    print("\nChange vs", old_path)
+    for run in new_results["runs"]:
+        before = old.get((run["mode"], run["workers"]))
+        if before is None:
+            continue
+        speed = (run["orders_per_sec"] / before["orders_per_sec"] - 1) * 100
+        p99 = (run["p99_us"] / before["p99_us"] - 1) * 100 if before["p99_us"] else 0.0
+        print(f"  {run['mode']:>7} x{run['workers']}: orders/s {speed:+6.1f}%   p99 {p99:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=4, help="threads/processes for the parallel modes")
+    parser.add_argument("--modes", nargs="+", default=["single", "thread", "process"],
+                        choices=["single", "thread", "process"])
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="drink weights, e.g. espresso=5,latte=3")
+    parser.add_argument("--refill-every", type=int, default=0,
+                        help="refill after every N orders (0 = only when something runs out)")
+    parser.add_argument("--alloc-orders", type=int, default=5000,
+                        help="orders in the tracemalloc pass (0 to skip it)")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", metavar="OLD_JSON", help="print the change vs an earlier --output file")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    runs = []
+    print(f"{'mode':>7} {'workers':>7} {'orders/s':>10} {'p50 us':>8} {'p99 us':>8} {'served':>8} {'no stock':>8}")
+    for mode in args.modes:
+        run = run_mode(mode, args.workers, args.orders, mix, args.refill_every)
+        runs.append(run)
+        print(f"{run['mode']:>7} {run['workers']:>7} {run['orders_per_sec']:>10,} {run['p50_us']:>8} "
+              f"{run['p99_us']:>8} {run['served']:>8} {run['out_of_stock']:>8}")
+
+    results = {"mix": mix, "refill_every": args.refill_every, "runs": runs}
+    if args.alloc_orders:
+        results["peak_bytes_per_order"] = measure_allocations(args.alloc_orders, mix, args.refill_every)
+        print(f"Peak bytes allocated per order: {results['peak_bytes_per_order']}")
+
+    if args.compare:
+        compare(args.compare, results)
+    if args.output:
+        common.write_results(args.output, "order_pipeline", results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Order queue vs. first come, first served on the simulated hardware.
+
+The same customers (Poisson arrivals; some are groups ordering several
+drinks at once, some are high-priority app orders) are served four ways:
+
+  fifo_one_at_a_time   one drink at a time, in arrival order (no queue)
+  fifo_pipelined       arrival order, stations pipelined (see bench_hardware.py)
+  queue                OrderQueue: priorities + fair queueing, no batching
+  queue_batched        OrderQueue with batches of identical drinks
+
+Reports drinks per hour, waiting times (all orders, high priority, and
+customers ordering a single drink, who suffer most behind big groups),
+queue depth and batch size. Time is simulated.
+
+    python benchmarks/bench_queue.py --hours 3 --per-minute 1.4 --output queue.json
+"""
+import argparse
+import random
+import sys
+
+import common
+from bench_orders import DEFAULT_MIX, parse_mix
+from backend.config import load_config
+from backend.hardware import load_stations, simulate_orders, throughput_report
+from backend.logic import CoffeeMachine
+from backend.order_queue import OrderQueue
+
+
+def customers(hours, per_minute, mix, group_share, group_size, high_share, seed):
+    """[(arrival, drink, priority, source), ...]; a group's drinks share one arrival and source."""
+    rng = random.Random(seed)
+    drinks, weights = zip(*mix.items())
+    orders = []
+    now = 0.0
+    number = 0
+    while True:
+        now += rng.expovariate(per_minute / 60)
+        if now >= hours * 3600:
+            return orders
+        number += 1
+        count = rng.randint(2, group_size) if rng.random() < group_share else 1
+        priority = "high" if rng.random() < high_share else "normal"
+        for _ in range(count):
+            orders.append((now, rng.choices(drinks, weights)[0], priority, f"customer-{number}"))
+
+
+def depth_stats(records, span):
+    """Mean (Little's law: total waiting / time) and max number of orders waiting in line."""
+    changes = sorted([(record["arrival"], 1) for record in records] +
+                     [(record["start"], -1) for record in records], key=lambda change: (change[0], change[1]))
+    depth = max_depth = 0
+    for _, change in changes:
+        depth += change
+        max_depth = max(max_depth, depth)
+    return round(sum(record["wait"] for record in records) / span, 2), max_depth
+
+
+def p95(values):
+    values = sorted(values)
+    return round(common.percentile(values, 95), 1) if values else 0.0
+
+
+def run(mode, orders, machine, stations, max_batch):
+    order_queue = None
+    max_in_progress = None
+    if mode == "fifo_one_at_a_time":
+        max_in_progress = 1
+    elif mode.startswith("queue"):
+        order_queue = OrderQueue(machine.menu, stations, max_batch=max_batch if mode == "queue_batched" else 1)
+
+    records, busy_seconds = simulate_orders(orders, machine.menu, stations, max_in_progress, order_queue)
+    report = throughput_report(records, busy_seconds, stations)
+
+    group_sizes = {}
+    for order in orders:
+        group_sizes[order[3]] = group_sizes.get(order[3], 0) + 1
+    report["high_wait_p95"] = p95([r["wait"] for r in records if r["priority"] == "high"])
+    report["single_wait_p95"] = p95([r["wait"] for r, order in zip(records, orders) if group_sizes[order[3]] == 1])
+    report["mean_depth"], report["max_depth"] = depth_stats(records, report["makespan"])
+    report["mean_batch"] = order_queue.stats()["mean_batch"] if order_queue is not None else 1.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=3)
+    parser.add_argument("--per-minute", type=float, default=1.4, help="average customers per minute")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="drink weights, e.g. espresso=5,latte=3")
+    parser.add_argument("--group-share", type=float, default=0.1, help="share of customers ordering for a group")
+    parser.add_argument("--group-size", type=int, default=8, help="largest group order")
+    parser.add_argument("--high-share", type=float, default=0.1, help="share of high-priority customers")
+    parser.add_argument("--max-batch", type=int, default=4)
+    parser.add_argument("--config", help="machine config (JSON) with a \"hardware\" section")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    config = load_config(args.config) if args.config else None
+    machine = CoffeeMachine(config)
+    stations = load_stations((config or {}).get("hardware"))
+    orders = customers(args.hours, args.per_minute, parse_mix(args.mix), args.group_share, args.group_size,
+                       args.high_share, args.seed)
+
+    runs = {}
+    for mode in ("fifo_one_at_a_time", "fifo_pipelined", "queue", "queue_batched"):
+        runs[mode] = run(mode, orders, machine, stations, args.max_batch)
+
+    print(f"{len(orders)} drinks over {args.hours} h")
+    print(f"{'mode':>19} {'drinks/h':>9} {'wait p50':>9} {'wait p95':>9} {'high p95':>9} {'single p95':>11} "
+          f"{'mean depth':>11} {'max depth':>10} {'batch':>6}")
+    for mode, report in runs.items():
+        print(f"{mode:>19} {report['drinks_per_hour']:>9} {report['wait']['p50']:>9} {report['wait']['p95']:>9} "
+              f"{report['high_wait_p95']:>9} {report['single_wait_p95']:>11} {report['mean_depth']:>11} "
+              f"{report['max_depth']:>10} {report['mean_batch']:>6}")
+    baseline = runs["fifo_one_at_a_time"]["drinks_per_hour"]
+    print(f"Throughput vs. FIFO one at a time: " + ", ".join(
+        f"{mode} x{report['drinks_per_hour'] / baseline:.2f}" for mode, report in runs.items()))
+
+    if args.output:
+        common.write_results(args.output, "order_queue", {
+            "drinks": len(orders), "hours": args.hours, "per_minute": args.per_minute,
+            "group_share": args.group_share, "high_share": args.high_share, "max_batch": args.max_batch,
+            "runs": runs,
+        })
+
+
+if __name__ == "__main__":
+    sys.exit(main())
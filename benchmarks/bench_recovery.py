@@ -0,0 +1,135 @@
+"""
+Startup recovery benchmark: full journal replay vs. snapshot + tail.
+
+Runs orders (order + payment events, with refills when stock runs out)
+through a machine that journals everything and snapshots every
+--snapshot-every events. At each of the --sizes a snapshot is taken,
+--tail more events are written after it (by default 90% of a
+snapshot interval, close to the worst case), and a fresh machine is
+recovered both ways and timed:
+
+  full replay        every event since the journal was created
+  snapshot + tail    mmap the latest snapshot, replay what came after it
+
+Full replay grows with the history; snapshot recovery should stay flat.
+
+    python benchmarks/bench_recovery.py --sizes 10000 100000 1000000 --output recovery.json
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import common
+from backend.logic import CoffeeMachine, enable_journal, process_payment, verify_resources
+from backend.snapshot import Snapshotter, recover
+
+DRINKS = ["espresso", "latte", "cappuccino"]
+
+
+def find_snapshotter(machine):
+    return next(listener for listener in machine.listeners if isinstance(listener, Snapshotter))
+
+
+def run_orders_until(machine, journal, events, rng):
+    """Places orders until the journal holds at least 'events' records."""
+    while journal.seq < events:
+        drink = rng.choice(DRINKS)
+        ok, _ = verify_resources(drink, machine)
+        if not ok:
+            machine.refill()
+            continue
+        process_payment(machine.MENU[drink]["cost"], 0, 0, 0, 0, 5, coffee_machine=machine)
+
+
+def timed_recovery(journal_path, snapshot_path, repeat):
+    """Best of 'repeat' recoveries into a fresh machine. Returns (seconds, info, machine)."""
+    best = None
+    for _ in range(repeat):
+        machine = CoffeeMachine()
+        started = time.perf_counter()
+        info = recover(machine, journal_path, snapshot_path)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[0]:
+            best = (elapsed, info, machine)
+    return best
+
+
+def run(sizes, snapshot_every, tail, repeat, skip_full_above, work_dir):
+    journal_path = os.path.join(work_dir, "journal.log")
+    snapshot_path = journal_path + ".snapshot"
+
+    live = CoffeeMachine()
+    # No fsync: this measures reading the history back, not writing it
+    journal = enable_journal(journal_path, live, snapshot_every=snapshot_every, fsync=False, batch_size=4096)
+    snapshotter = find_snapshotter(live)
+    rng = random.Random(0)
+
+    rows = []
+    for size in sorted(sizes):
+        run_orders_until(live, journal, size, rng)
+        # Snapshot at 'size' exactly, then leave 'tail' events for recovery to replay
+        snapshotter.take()
+        run_orders_until(live, journal, journal.seq + tail, rng)
+        journal.flush()
+        snapshotter.wait()
+        expected = (live.resources, live.cash_box.snapshot())
+
+        row = {
+            "events": journal.seq,
+            "journal_mb": round(os.path.getsize(journal_path) / 1e6, 2),
+        }
+
+        elapsed, info, machine = timed_recovery(journal_path, snapshot_path, repeat)
+        assert (machine.resources, machine.cash_box.snapshot()) == expected, "snapshot recovery mismatch"
+        row["snapshot_ms"] = round(elapsed * 1000, 3)
+        row["tail_events"] = info["replayed"]
+
+        if not skip_full_above or size <= skip_full_above:
+            elapsed, info, machine = timed_recovery(journal_path, None, repeat)
+            assert (machine.resources, machine.cash_box.snapshot()) == expected, "full replay mismatch"
+            row["full_replay_ms"] = round(elapsed * 1000, 3)
+        else:
+            row["full_replay_ms"] = None
+
+        rows.append(row)
+        full = f"{row['full_replay_ms']:>14,.1f}" if row["full_replay_ms"] is not None else f"{'skipped':>14}"
+        print(f"{row['events']:>10,} {row['journal_mb']:>9} {full} {row['snapshot_ms']:>12,.2f} {row['tail_events']:>8,}")
+
+    journal.close()
+    return {"snapshot_every": snapshot_every, "tail": tail, "repeat": repeat, "rows": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="journal sizes (events) to measure recovery at")
+    parser.add_argument("--snapshot-every", type=int, default=10_000)
+    parser.add_argument("--tail", type=int, help="events after the last snapshot (default: 90%% of --snapshot-every)")
+    parser.add_argument("--repeat", type=int, default=3, help="recoveries per size (best is kept)")
+    parser.add_argument("--skip-full-above", type=int, default=0,
+                        help="skip the full replay for journals bigger than this (0 = never skip)")
+    parser.add_argument("--keep", metavar="DIR", help="build the journal in DIR and leave it there")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    tail = args.snapshot_every * 9 // 10 if args.tail is None else args.tail
+
+    work_dir = args.keep or tempfile.mkdtemp(prefix="coffee-recovery-")
+    os.makedirs(work_dir, exist_ok=True)
+    print(f"{'events':>10} {'journal MB':>9} {'full replay ms':>14} {'snapshot ms':>12} {'tail':>8}")
+    try:
+        results = run(args.sizes, args.snapshot_every, tail, args.repeat, args.skip_full_above, work_dir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        common.write_results(args.output, "startup_recovery", results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
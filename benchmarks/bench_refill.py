@@ -0,0 +1,140 @@
+"""
+Refill policy simulation: reactive vs. predictive refills.
+
+Simulates a day of customers (Poisson arrivals, weighted drink mix) on
+one machine. A refill is requested, and the operator arrives
+--response-minutes later and fills everything up:
+
+  reactive     the request goes out when an order fails ("Not enough X"),
+               which is what happens today
+  predictive   RefillScheduler forecasts the time to empty and sends the
+               request when it drops below the response time plus a margin
+
+Both policies see exactly the same customers. Time is simulated, so a
+whole day runs in well under a second.
+
+    python benchmarks/bench_refill.py --hours 12 --per-minute 1.5 --output refill.json
+"""
+import argparse
+import random
+import sys
+
+import common
+from bench_orders import DEFAULT_MIX, parse_mix
+from backend.logic import CoffeeMachine, verify_resources
+from backend.refill_scheduler import RefillScheduler
+
+# Bigger than the built-in levels, closer to a real machine's tanks
+DEFAULT_CAPACITY = "water=5000,milk=3000,coffee=1000"
+
+
+def parse_levels(text):
+    return {name.strip(): int(amount) for name, _, amount in (part.partition("=") for part in text.split(","))}
+
+
+def customer_arrivals(hours, per_minute, mix, seed):
+    """[(time in seconds, drink), ...] for a Poisson arrival process."""
+    rng = random.Random(seed)
+    drinks, weights = zip(*mix.items())
+    arrivals = []
+    now = 0.0
+    end = hours * 3600
+    while True:
+        now += rng.expovariate(per_minute / 60)
+        if now >= end:
+            return arrivals
+        arrivals.append((now, rng.choices(drinks, weights)[0]))
+
+
+def simulate(policy, arrivals, capacity, response_time, margin, tick):
+    machine = CoffeeMachine({"capacity": capacity})
+
+    clock = [0.0]
+    refill_at = [None]  # when the operator will arrive (None = nobody called)
+    stats = {"policy": policy, "served": 0, "failed": 0, "refills": 0, "refill_requests": 0}
+
+    def request_refill(now):
+        if refill_at[0] is None:
+            refill_at[0] = now + response_time
+            stats["refill_requests"] += 1
+
+    scheduler = None
+    if policy == "predictive":
+        scheduler = RefillScheduler(machine, lead_time=response_time + margin, interval=tick,
+                                    clock=lambda: clock[0])
+        machine.subscribe(scheduler)
+        machine.subscribe(lambda event_type, data: event_type == "refill_due" and request_refill(clock[0]))
+
+    next_tick = tick
+    for arrival_time, drink in arrivals:
+        # Let everything scheduled before this customer happen first
+        while True:
+            operator = refill_at[0] if refill_at[0] is not None else float("inf")
+            upcoming = min(operator, next_tick if scheduler else float("inf"))
+            if upcoming > arrival_time:
+                break
+            clock[0] = upcoming
+            if upcoming == operator:
+                refill_at[0] = None
+                machine.refill()
+                stats["refills"] += 1
+            else:
+                scheduler.tick()
+                next_tick += tick
+
+        clock[0] = arrival_time
+        ok, _ = verify_resources(drink, machine)
+        if ok:
+            stats["served"] += 1
+        else:
+            stats["failed"] += 1
+            request_refill(arrival_time)
+
+    total = stats["served"] + stats["failed"]
+    stats["failed_pct"] = round(100 * stats["failed"] / total, 2) if total else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=12)
+    parser.add_argument("--per-minute", type=float, default=1.5, help="average customers per minute")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="drink weights, e.g. espresso=5,latte=3")
+    parser.add_argument("--capacity", default=DEFAULT_CAPACITY, help="tank sizes, e.g. water=5000,milk=3000")
+    parser.add_argument("--response-minutes", type=float, default=10, help="time for the operator to arrive")
+    parser.add_argument("--margin-minutes", type=float, default=5, help="extra warning for the predictive policy")
+    parser.add_argument("--tick", type=float, default=5, help="scheduler interval in seconds")
+    parser.add_argument("--seeds", type=int, default=5, help="number of simulated days")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    capacity = parse_levels(args.capacity)
+    runs = []
+    print(f"{'policy':>10} {'seed':>5} {'served':>7} {'failed':>7} {'failed %':>9} {'refills':>8}")
+    for seed in range(args.seeds):
+        arrivals = customer_arrivals(args.hours, args.per_minute, mix, seed)
+        for policy in ("reactive", "predictive"):
+            run = simulate(policy, arrivals, capacity, args.response_minutes * 60, args.margin_minutes * 60,
+                           args.tick)
+            run["seed"] = seed
+            runs.append(run)
+            print(f"{policy:>10} {seed:>5} {run['served']:>7} {run['failed']:>7} {run['failed_pct']:>9} "
+                  f"{run['refills']:>8}")
+
+    totals = {}
+    for policy in ("reactive", "predictive"):
+        mine = [run for run in runs if run["policy"] == policy]
+        totals[policy] = {key: sum(run[key] for run in mine) for key in ("served", "failed", "refills")}
+    print("Failed orders:", {policy: total["failed"] for policy, total in totals.items()})
+
+    if args.output:
+        common.write_results(args.output, "refill_policy", {
+            "hours": args.hours, "per_minute": args.per_minute, "mix": mix, "capacity": capacity,
+            "response_minutes": args.response_minutes, "margin_minutes": args.margin_minutes,
+            "totals": totals, "runs": runs,
+        })
+
+
+if __name__ == "__main__":
+    sys.exit(main())
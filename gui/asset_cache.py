@@ -0,0 +1,271 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageTk
+import glob, hashlib, mmap, os, queue, struct
+
+current_script_path = os.path.abspath(__file__)
+gui_folder_path = os.path.dirname(current_script_path)
+project_root = os.path.dirname(gui_folder_path)
+assets_dir = os.path.join(project_root, "assets")
+default_cache_dir = os.path.join(project_root, ".cache", "screens")
+
+# Every screen is drawn at the window size
+SCREEN_SIZE = (540, 960)
+
+# Default memory cap: roughly a dozen full-frame RGBA backgrounds
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# How often (ms) the Tk thread picks up images finished by the preloader
+PRELOAD_POLL_MS = 15
+
+# Disk blob header: magic, width, height, PIL mode padded to 4 bytes
+BLOB_HEADER = struct.Struct("<4sII4s")
+BLOB_MAGIC = b"CMIC"
+
+
+class DiskImageCache:
+    """
+    Keeps already-resized screens on disk as raw pixel blobs, so a
+    restarted app can memory-map them instead of decoding + resampling
+    the PNGs again.
+
+    Blobs are named after the asset's content hash, the target size and
+    the resampling filter, so editing a file in assets/ automatically
+    makes its old blob unused (and it gets deleted on the next store).
+    """
+
+    def __init__(self, cache_dir=default_cache_dir):
+        self.cache_dir = cache_dir
+        # path -> (mtime, size, sha256) so we only re-hash changed files
+        self._hashes = {}
+
+    def content_hash(self, path):
+        stat = os.stat(path)
+        known = self._hashes.get(path)
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+        self._hashes[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def blob_prefix(self, file_name, size, resample):
+        stem = os.path.splitext(file_name)[0]
+        return os.path.join(self.cache_dir, f"{stem}-{size[0]}x{size[1]}-f{int(resample)}")
+
+    def blob_path(self, path, file_name, size, resample):
+        prefix = self.blob_prefix(file_name, size, resample)
+        return f"{prefix}-{self.content_hash(path)}.raw"
+
+    def load(self, path, file_name, size, resample):
+        """Returns the cached PIL image, or None if there is no valid blob."""
+        try:
+            blob = self.blob_path(path, file_name, size, resample)
+            with open(blob, "rb") as f:
+                # The mapping stays alive as long as the image uses it
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        mode = self._check_blob(data, size)
+        if mode is None:
+            # Close the mapping now instead of whenever it is garbage collected
+            data.close()
+            return None
+
+        width, height = size
+        buffer = memoryview(data)[BLOB_HEADER.size:]
+        return Image.frombuffer(mode, (width, height), buffer, "raw", mode, 0, 1)
+
+    @staticmethod
+    def _check_blob(data, size):
+        """The blob's image mode, or None if it is not a complete blob of this size."""
+        # A crash while writing can leave a blob shorter than its header
+        if len(data) < BLOB_HEADER.size:
+            return None
+        magic, width, height, mode = BLOB_HEADER.unpack_from(data)
+        if magic != BLOB_MAGIC or (width, height) != tuple(size):
+            return None
+        mode = mode.rstrip(b" ").decode("ascii", errors="replace")
+        if mode not in ("RGB", "RGBA"):
+            return None
+        if len(data) != BLOB_HEADER.size + width * height * len(mode):
+            return None
+        return mode
+
+    def store(self, path, file_name, size, resample, pil_image):
+        """Writes a resized image to disk. Failures are ignored (cache is optional)."""
+        if pil_image.mode not in ("RGB", "RGBA"):
+            pil_image = pil_image.convert("RGBA")
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            blob = self.blob_path(path, file_name, size, resample)
+
+            # Remove blobs left over from older versions of this asset
+            for old in glob.glob(glob.escape(self.blob_prefix(file_name, size, resample)) + "-*.raw"):
+                if old != blob:
+                    os.remove(old)
+
+            header = BLOB_HEADER.pack(BLOB_MAGIC, pil_image.width, pil_image.height,
+                                      pil_image.mode.ljust(4).encode("ascii"))
+            # Write to a temp file first so a crash never leaves half a blob
+            tmp = f"{blob}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(header)
+                f.write(pil_image.tobytes())
+            os.replace(tmp, blob)
+        except OSError:
+            pass
+
+
+class AssetCache:
+    """
+    Decodes and scales each background image ONCE and keeps the
+    ready-to-draw PhotoImage around, so showing a screen again is just
+    a dictionary lookup instead of a PNG decode + LANCZOS resize.
+
+    Entries are keyed by (file name, target size, resampling filter) and
+    the least recently used ones are evicted when the cache goes over
+    max_bytes.
+    """
+
+    def __init__(self, master, max_bytes=DEFAULT_MAX_BYTES, disk_cache=None):
+        self.master = master
+        self.max_bytes = max_bytes
+        # Optional second level that survives restarts
+        self.disk_cache = disk_cache
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        # key -> (PhotoImage, size in bytes), oldest first
+        self._entries = OrderedDict()
+
+        # Background preloading: workers decode, the Tk thread wraps.
+        # PhotoImage must only ever be created on the Tk thread.
+        self._executor = None
+        self._pending = {}  # key -> Future of a decoded PIL image
+        self._finished = queue.Queue()
+        self._polling = False
+
+    def get(self, file_name, size=SCREEN_SIZE, resample=Image.Resampling.LANCZOS):
+        """Returns a PhotoImage for an asset, decoding it only on a cache miss."""
+        key = (file_name, tuple(size), resample)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        future = self._pending.pop(key, None)
+        if future is not None:
+            # The preloader is already on it: wait for that instead of decoding twice
+            pil_image = future.result()
+        else:
+            pil_image = self.load_image(file_name, size, resample)
+        return self.put(key, pil_image)
+
+    def preload(self, file_names, size=SCREEN_SIZE, resample=Image.Resampling.LANCZOS, workers=4):
+        """
+        Decodes assets on a thread pool while the user looks at the current
+        screen. PIL releases the GIL while decoding and resampling, so the
+        workers really run in parallel with the Tk event loop.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset-preload")
+
+        for file_name in file_names:
+            key = (file_name, tuple(size), resample)
+            if key in self._entries or key in self._pending:
+                continue
+            if not os.path.exists(os.path.join(assets_dir, file_name)):
+                continue
+
+            future = self._executor.submit(self.load_image, file_name, size, resample)
+            # Runs on the worker thread, so only hand the key over via the queue
+            future.add_done_callback(lambda f, key=key: self._finished.put(key))
+            self._pending[key] = future
+
+        if self._pending and not self._polling:
+            self._polling = True
+            self.master.after(PRELOAD_POLL_MS, self._collect_preloaded)
+
+    def _collect_preloaded(self):
+        """Runs on the Tk thread: turns finished decodes into PhotoImages."""
+        while True:
+            try:
+                key = self._finished.get_nowait()
+            except queue.Empty:
+                break
+
+            future = self._pending.pop(key, None)
+            if future is None:
+                # get() already picked this one up
+                continue
+            if future.exception() is None:
+                self.put(key, future.result())
+
+        if self._pending:
+            self.master.after(PRELOAD_POLL_MS, self._collect_preloaded)
+        else:
+            self._polling = False
+
+    def close(self):
+        """Stops the preloader (pending decodes are dropped)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
+
+    def load_image(self, file_name, size, resample):
+        """Decodes and resizes one asset (the slow part, unless it is on disk)."""
+        path = os.path.join(assets_dir, file_name)
+
+        if self.disk_cache is not None:
+            pil_image = self.disk_cache.load(path, file_name, size, resample)
+            if pil_image is not None:
+                return pil_image
+
+        with Image.open(path) as pil_image:
+            pil_image = pil_image.resize(tuple(size), resample)
+
+        if self.disk_cache is not None:
+            self.disk_cache.store(path, file_name, size, resample, pil_image)
+        return pil_image
+
+    def put(self, key, pil_image):
+        """Wraps a decoded PIL image into a PhotoImage and stores it."""
+        photo = ImageTk.PhotoImage(pil_image, master=self.master)
+        # PhotoImage keeps its own RGBA copy inside Tk
+        nbytes = pil_image.width * pil_image.height * 4
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.current_bytes -= old[1]
+
+        self._entries[key] = (photo, nbytes)
+        self.current_bytes += nbytes
+        self.evict()
+        return photo
+
+    def evict(self):
+        """Drops least recently used images until we are under the cap."""
+        # Always keep the newest entry, even if it alone is over the cap
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.current_bytes -= nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
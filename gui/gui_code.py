@@ -1,7 +1,8 @@
 import ttkbootstrap as ttk
 from ttkbootstrap import Label, Button
-from PIL import Image, ImageTk
-import os, sys, webbrowser
+from contextlib import nullcontext
+from tkinter import TclError
+import os, sys
 # 1. Get the directory where gui.py lives
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -10,7 +11,32 @@ parent_dir = os.path.dirname(current_dir)
 
 # 3. Add that root directory to python's search path
 sys.path.append(parent_dir)
-from backend import verify_resources, machine, process_payment
+from backend.money import describe_coins
+from backend import machine, reserve_drink, cancel_order, release_expired_holds, exact_change_only, brew_drink
+from gui.asset_cache import AssetCache, DiskImageCache, DEFAULT_MAX_BYTES, default_cache_dir, assets_dir
+from gui.lifecycle import ScreenLifecycle
+from gui.memory_probe import MemoryProbe
+from gui.order_pipeline import OrderPipeline, take_payment
+
+# How often (ms) abandoned payments are checked and their stock released
+HOLD_SWEEP_MS = 5000
+
+# How often (ms) the brewing screen animates its status text
+ANIMATION_MS = 300
+
+# How long (ms) a brewing error stays up before going back to the menu
+BREW_ERROR_MS = 5000
+
+# What the brewing screen says while a hardware station works on the drink
+STATION_LABELS = {
+    "grinder": "Grinding beans",
+    "boiler": "Brewing",
+    "frother": "Frothing milk",
+    "dispenser": "Pouring",
+}
+
+# Drink screen for menu drinks that do not have their own picture
+DEFAULT_DRINK_IMAGE = "EspressoWindow.png"
 
 current_script_path = os.path.abspath(__file__)
 gui_folder_path = os.path.dirname(current_script_path)
@@ -19,94 +45,172 @@ project_root = os.path.dirname(gui_folder_path)
 
 # --- CONTROLLER CLASS (THE TV FRAME) ---
 class CoffeeApp(ttk.Window):
-    def __init__(self):
-        super().__init__(themename="darkly")
+    def __init__(self, asset_cache_bytes=DEFAULT_MAX_BYTES, cache_dir=default_cache_dir,
+                 profiler=None, run_mainloop=True, pipeline_workers=1):
+        # Optional StartupProfiler (see main.py --profile-startup)
+        self.profiler = profiler
+
+        with self.phase("theme creation"):
+            super().__init__(themename="darkly")
         self.title("Coffee Machine")
         self.geometry("540x960")
         self.resizable(True, True)
 
         self.drink=""
+        self.drink_name = None  # menu key of the drink being ordered (e.g. "latte")
+        self.drink_image = DEFAULT_DRINK_IMAGE
+        # Ingredients held for the order being paid (see backend reserve_drink)
+        self.hold_id = None
+
+        # Payment and brewing run on a worker thread so the window never freezes
+        self.pipeline = OrderPipeline(self, workers=pipeline_workers)
+
+        # Screen stack: every page is built the first time it is shown and
+        # then kept alive. Switching screens only raises the page and lets
+        # it reset its own fields, instead of rebuilding all its widgets.
+        self.frames = {}
+        self.current_page = None
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        # One image cache for every screen (decode + resize happens once).
+        # Resized frames are also kept on disk so restarts skip the decode;
+        # pass cache_dir=None to turn that off.
+        disk_cache = DiskImageCache(cache_dir) if cache_dir else None
+        self.assets = AssetCache(self, max_bytes=asset_cache_bytes, disk_cache=disk_cache)
 
         # Set icon ONCE for the whole app
         icon_path = os.path.join(project_root, "assets", "logo.ico")
-        self.iconbitmap(icon_path)
+        with self.phase("iconbitmap"):
+            try:
+                self.iconbitmap(icon_path)
+            except TclError:
+                # .ico only works on Windows; use the PNG logo elsewhere (e.g. under Xvfb)
+                self.iconphoto(True, self.assets.get("logo.png", size=(64, 64)))
 
         # Show the first screen
-        self.show_start_screen()
-
-        self.mainloop()
-
-    def clear_screen(self):
-        # Destroy current content before showing new content
-        for widget in self.winfo_children():
-            widget.destroy()
+        with self.phase("first screen"):
+            self.show_start_screen()
+
+        if self.profiler is not None:
+            # Let Tk map and draw the window so we can time the first paint
+            with self.phase("first paint"):
+                self.update()
+            self.profiler.check_lazy_modules()
+
+        # Once the start screen is on display, decode every other screen in
+        # the background so no later transition waits on an image
+        self.after_idle(self.preload_screens)
+
+        # Give back stock from payments that were walked away from
+        self._sweep_after = self.after(HOLD_SWEEP_MS, self.sweep_holds)
+
+        # Memory instrumentation: Ctrl+Shift+M writes a report to memory_reports/.
+        # Set COFFEE_TRACE_MEMORY=1 to include tracemalloc allocation diffs.
+        self.memory_probe = MemoryProbe(self, trace=os.environ.get("COFFEE_TRACE_MEMORY") == "1")
+        self.bind_all("<Control-Shift-M>", lambda e: self.memory_probe.dump())
+
+        if run_mainloop:
+            self.mainloop()
+
+    def phase(self, name):
+        """Times a block of startup work when a profiler is attached."""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(name)
+
+    def preload_screens(self):
+        screens = ["OrderWindow.png", "PaymentWindow.png", "ChangeWindow.png"]
+        screens += [drink_image(drink_id) for drink_id in range(len(machine.menu))]
+        self.assets.preload(screens)
+
+    def sweep_holds(self):
+        release_expired_holds()
+        self._sweep_after = self.after(HOLD_SWEEP_MS, self.sweep_holds)
+
+    def destroy(self):
+        self.after_cancel(self._sweep_after)
+        self.pipeline.close()
+        # A customer walked off mid-order: give the held ingredients back
+        if self.hold_id is not None:
+            cancel_order(self.hold_id)
+            self.hold_id = None
+        self.assets.close()
+        super().destroy()
+
+    def show_page(self, page_class, *args):
+        page = self.frames.get(page_class)
+        if page is None:
+            # First visit: build the page once and stack it in the same cell
+            page = page_class(self)
+            page.grid(row=0, column=0, sticky="nsew")
+            self.frames[page_class] = page
+
+        # The page we are leaving drops its per-visit images and timers
+        if self.current_page is not None and self.current_page is not page:
+            self.current_page.on_hide()
+
+        # Only update what changes between visits, then bring it to the front
+        page.reset(*args)
+        page.tkraise()
+        self.current_page = page
+        return page
 
     def show_start_screen(self):
-        self.clear_screen()
-        # Create the Start Frame and pack it
-        start_page = StartPage(self)
-        start_page.pack(fill="both", expand=True)
+        self.show_page(StartPage)
 
     def show_order_screen(self):
-        self.clear_screen()
-        order_page = OrderPage(self)
-        order_page.pack(fill="both", expand=True)
+        self.show_page(OrderPage)
 
     def show_payment_screen(self, cost):
-        self.clear_screen()
         # We pass the 'cost' to the payment page
-        payment_page = PaymentPage(self, cost)
-        payment_page.pack(fill="both", expand=True)
+        self.show_page(PaymentPage, cost)
 
-    def show_give_change_screen(self, change):
-        self.clear_screen()
-        # Pass the change amount to the page
-        payment_page = GiveChangePage(self, change)
-        payment_page.pack(fill="both", expand=True)
+    def show_brewing_screen(self, change, change_coins=None):
+        # The change is handed out once the drink is ready
+        self.show_page(BrewingPage, change, change_coins)
+
+    def show_give_change_screen(self, change, change_coins=None):
+        # Pass the change amount (and which coins make it up) to the page
+        self.show_page(GiveChangePage, change, change_coins)
 
     def show_delivery_screen(self):
-        self.clear_screen()
         # FIX: Use GiveDrinkPage, not PaymentPage
-        delivery_page = GiveDrinkPage(self)
-        delivery_page.pack(fill="both", expand=True)
+        self.show_page(GiveDrinkPage)
 
 
-# --- SCREEN 1: START (Converted to Frame) ---
-class StartPage(ttk.Frame):
+def drink_image(drink_id):
+    """The drink's screen picture, or the default one if the file is not in assets/."""
+    file_name = machine.menu.images[drink_id]
+    if os.path.exists(os.path.join(assets_dir, file_name)):
+        return file_name
+    return DEFAULT_DRINK_IMAGE
+
+
+# --- SHARED BASE FOR ALL SCREENS ---
+class ScreenPage(ScreenLifecycle, ttk.Frame):
+    """
+    A full-window canvas with a background image and the contact footer.
+    Pages are built once and reused, so every image, binding and timer
+    goes through ScreenLifecycle and is released when the page is hidden
+    or destroyed.
+    """
+
     def __init__(self, master):
         super().__init__(master)
         self.master = master  # Save reference to the App controller
+        self.init_lifecycle()
 
-        # Logic to load image
         self.canvas = ttk.Canvas(self)
         self.canvas.pack(fill="both", expand=True)
+        self.background = self.canvas.create_image(0, 0, anchor="nw")
 
-        screen3_path = os.path.join(project_root, "assets", "StartScreen.png")
-        pil_image = Image.open(screen3_path)
-        pil_image = pil_image.resize((540, 960), Image.Resampling.LANCZOS)
-        self.photo = ImageTk.PhotoImage(pil_image)
-
-        self.canvas.create_image(0, 0, image=self.photo, anchor="nw")
-
-        btn_order = Button(
-            self,
-            text="Order a Coffee",
-            bootstyle="warning",
-            width=30,
-            command=self.master.show_order_screen  # Call controller function
-        )
-        btn_order.place(x=140, y=550)
-        self.canvas.create_window(270, 550, window=btn_order)
-
-        btn_exit = Button(
-            self,
-            text="Exit",
-            bootstyle="warning",
-            width=30,
-            command=self.master.destroy
-        )
-        self.canvas.create_window(270, 600, window=btn_exit)
+    def set_background(self, file_name, per_visit=False):
+        photo = self.master.assets.get(file_name)
+        self.keep_image("background", photo, per_visit)
+        self.canvas.itemconfig(self.background, image=photo)
 
+    def add_footer(self):
         self.mail = self.canvas.create_text(
             187, 840,
             text="akshajgoel@bnpsramvihar.edu.in",
@@ -121,116 +225,142 @@ class StartPage(ttk.Frame):
             font=("Segoe UI", 8)
         )
 
-        def mail(event):
-            webbrowser.open_new("mailto:akshajgoel@bnpsramvihar.edu.in")
+        for item, on_click in ((self.mail, self.open_mail), (self.web_link, self.open_website)):
+            self.bind_item(self.canvas, item, "<Button-1>", on_click)
+            self.bind_item(self.canvas, item, "<Enter>", self.hand_cursor)
+            self.bind_item(self.canvas, item, "<Leave>", self.default_cursor)
 
-        def open_link(event):
-            webbrowser.open_new("https://aksweb.me")
+    def open_mail(self, event):
+        # Imported on first click, it is not needed to start the app
+        import webbrowser
+        webbrowser.open_new("mailto:akshajgoel@bnpsramvihar.edu.in")
 
-        self.canvas.tag_bind(self.mail, "<Button-1>", mail)
-        self.canvas.tag_bind(self.mail, "<Enter>", lambda e: self.canvas.config(cursor="hand2"))
-        self.canvas.tag_bind(self.mail, "<Leave>", lambda e: self.canvas.config(cursor=""))
+    def open_website(self, event):
+        import webbrowser
+        webbrowser.open_new("https://aksweb.me")
 
-        self.canvas.tag_bind(self.web_link, "<Button-1>", open_link)
-        self.canvas.tag_bind(self.web_link, "<Enter>", lambda e: self.canvas.config(cursor="hand2"))
-        self.canvas.tag_bind(self.web_link, "<Leave>", lambda e: self.canvas.config(cursor=""))
+    def hand_cursor(self, event):
+        self.canvas.config(cursor="hand2")
 
+    def default_cursor(self, event):
+        self.canvas.config(cursor="")
 
-# --- SCREEN 2: ORDER (Converted to Frame) ---
-class OrderPage(ttk.Frame):
-    def __init__(self, master):
-        super().__init__(master)
-        self.master = master
+    def reset(self):
+        # Called every time the page is shown; pages override what changes
+        pass
 
-        self.drink = None
 
-        self.canvas = ttk.Canvas(self)
-        self.canvas.pack(fill="both", expand=True)
+# --- SCREEN 1: START (Converted to Frame) ---
+class StartPage(ScreenPage):
+    def __init__(self, master):
+        super().__init__(master)  # Canvas + footer helpers live in ScreenPage
 
-        screen3_path = os.path.join(project_root, "assets", "OrderWindow.png")
-        pil_image = Image.open(screen3_path)
-        pil_image = pil_image.resize((540, 960), Image.Resampling.LANCZOS)
-        self.photo = ImageTk.PhotoImage(pil_image)
+        # Decoded + scaled once, then served from the shared cache
+        self.set_background("StartScreen.png")
 
-        self.canvas.create_image(0, 0, image=self.photo, anchor="nw")
+        btn_order = Button(
+            self,
+            text="Order a Coffee",
+            bootstyle="warning",
+            width=30,
+            command=self.master.show_order_screen  # Call controller function
+        )
+        btn_order.place(x=140, y=550)
+        self.canvas.create_window(270, 550, window=btn_order)
 
-        # Buttons
-        btn_espresso = Button(self, text="Espresso ($1.50)", bootstyle="warning", width=20,
-                              command=lambda: self.select_drink("espresso"))
-        self.canvas.create_window(270, 550, window=btn_espresso)
+        btn_exit = Button(
+            self,
+            text="Exit",
+            bootstyle="warning",
+            width=30,
+            command=self.master.destroy
+        )
+        self.canvas.create_window(270, 600, window=btn_exit)
 
-        btn_latte = Button(self, text="Latte ($2.50)", bootstyle="warning", width=20,
-                           command=lambda: self.select_drink("latte"))
-        self.canvas.create_window(270, 600, window=btn_latte)
+        # Contact links at the bottom of every screen
+        self.add_footer()
 
-        btn_cappuccino = Button(self, text="Cappuccino ($3.00)", bootstyle="warning", width=20,
-                                command=lambda: self.select_drink("cappuccino"))
-        self.canvas.create_window(270, 650, window=btn_cappuccino)
 
-        self.mail = self.canvas.create_text(
-            187, 840,
-            text="akshajgoel@bnpsramvihar.edu.in",
-            fill="#FFF3DC",
-            font=("Segoe UI", 8)
-        )
+# --- SCREEN 2: ORDER (Converted to Frame) ---
+class OrderPage(ScreenPage):
+    def __init__(self, master):
+        super().__init__(master)
 
-        self.web_link = self.canvas.create_text(
-            430, 840,
-            text="aksweb.me",
-            fill="#FFF3DC",
-            font=("Segoe UI", 8)
-        )
+        self.drink = None
+        # True while a click is being handled on the worker
+        self.waiting = False
 
-        def mail(event):
-            webbrowser.open_new("mailto:akshajgoel@bnpsramvihar.edu.in")
+        # Decoded + scaled once, then served from the shared cache
+        self.set_background("OrderWindow.png")
 
-        def open_link(event):
-            webbrowser.open_new("https://aksweb.me")
+        # One button per drink on the menu, so new drinks need no GUI changes.
+        # Buttons sit 50px apart, closer together if the menu is long.
+        menu = machine.menu
+        spacing = min(50, 250 // max(len(menu), 1))
+        for drink_id, name in enumerate(menu.names):
+            button = Button(self, text=menu.label(drink_id), bootstyle="warning", width=20,
+                            command=lambda name=name: self.select_drink(name))
+            self.canvas.create_window(270, 550 + drink_id * spacing, window=button)
 
-        self.canvas.tag_bind(self.mail, "<Button-1>", mail)
-        self.canvas.tag_bind(self.mail, "<Enter>", lambda e: self.canvas.config(cursor="hand2"))
-        self.canvas.tag_bind(self.mail, "<Leave>", lambda e: self.canvas.config(cursor=""))
+        # Error label is created once and only shown when an order fails
+        self.lbl_error = Label(self, text="", bootstyle="danger", font=("Segoe UI", 12, "bold"))
 
-        self.canvas.tag_bind(self.web_link, "<Button-1>", open_link)
-        self.canvas.tag_bind(self.web_link, "<Enter>", lambda e: self.canvas.config(cursor="hand2"))
-        self.canvas.tag_bind(self.web_link, "<Leave>", lambda e: self.canvas.config(cursor=""))
+        # Contact links at the bottom of every screen
+        self.add_footer()
 
-    def select_drink(self, drink_name):
-        is_enough, missing_item = verify_resources(drink_name)
+    def reset(self):
+        self.drink = None
+        self.waiting = False
+        self.lbl_error.pack_forget()
 
-        if is_enough:
+    def select_drink(self, drink_name):
+        if self.waiting:
+            return  # Still holding the last drink clicked
+        self.waiting = True
+        # Ingredients are only held here; they are used up once payment succeeds
+        self.master.pipeline.submit(reserve_drink, lambda result: self.on_reserved(drink_name, result),
+                                    drink_name, on_error=self.on_failed)
+
+    def on_failed(self, error):
+        self.waiting = False
+        self.lbl_error.config(text="Sorry! Something went wrong, please try again.")
+        self.lbl_error.pack(side="bottom", pady=20)
+
+    def on_reserved(self, drink_name, result):
+        self.waiting = False
+        hold_id, missing_item = result
+
+        if hold_id is not None:
+            self.master.hold_id = hold_id
             # Look up cost from backend machine data
-            cost = machine.MENU[drink_name]["cost"]
-            self.drink = drink_name.title()
+            drink_id = machine.menu.ids[drink_name]
+            cost = machine.menu.prices[drink_id] / 100
+            self.drink = machine.menu.titles[drink_id]
             self.master.drink=self.drink
+            self.master.drink_name = drink_name
+            self.master.drink_image = drink_image(drink_id)
             # Tell controller to switch screens
             self.master.show_payment_screen(cost)
         else:
             error_text = f"Sorry! Not enough {missing_item}."
-            lbl_error = Label(self, text=error_text, bootstyle="danger", font=("Segoe UI", 12, "bold"))
-            lbl_error.pack(side="bottom", pady=20)
+            self.lbl_error.config(text=error_text)
+            self.lbl_error.pack(side="bottom", pady=20)
 
 
 # --- SCREEN 3: PAYMENT (Converted to Frame) ---
-class PaymentPage(ttk.Frame):
-    def __init__(self, master, cost):
+class PaymentPage(ScreenPage):
+    def __init__(self, master):
         super().__init__(master)
-        self.master = master
-        self.cost = cost
-
-        self.canvas = ttk.Canvas(self)
-        self.canvas.pack(fill="both", expand=True)
-
-        screen3_path = os.path.join(project_root, "assets", "PaymentWindow.png")
-        pil_image = Image.open(screen3_path)
-        pil_image = pil_image.resize((540, 960), Image.Resampling.LANCZOS)
-        self.photo = ImageTk.PhotoImage(pil_image)
+        self.cost = 0
+        # True while the payment is being processed on the worker
+        self.waiting = False
 
-        self.canvas.create_image(0, 0, image=self.photo, anchor="nw")
+        # Decoded + scaled once, then served from the shared cache
+        self.set_background("PaymentWindow.png")
 
-        self.canvas.create_text(
+        self.prompt_text = self.canvas.create_text(
             270, 420,
-            text=f"Please insert ${self.cost}",
+            text="",
             fill="#6D1F00",
             font=("Segoe UI", 16, "bold")
         )
@@ -267,35 +397,35 @@ class PaymentPage(ttk.Frame):
                          command=lambda: self.pay())
         self.canvas.create_window(270, 600, window=btn_pay)
 
-        self.mail = self.canvas.create_text(
-            187, 840,
-            text="akshajgoel@bnpsramvihar.edu.in",
-            fill="#FFF3DC",
-            font=("Segoe UI", 8)
-        )
+        btn_cancel = Button(self, text="Cancel", bootstyle="secondary", width=20,
+                            command=self.cancel)
+        self.canvas.create_window(270, 650, window=btn_cancel)
 
-        self.web_link = self.canvas.create_text(
-            430, 840,
-            text="aksweb.me",
-            fill="#FFF3DC",
-            font=("Segoe UI", 8)
+        # Filled in by pay() when the customer underpays
+        self.error_text = self.canvas.create_text(
+            270, 700,
+            text="",
+            fill="red",
+            font=("Segoe UI", 12, "bold")
         )
 
-        def mail(event):
-            webbrowser.open_new("mailto:akshajgoel@bnpsramvihar.edu.in")
-
-        def open_link(event):
-            webbrowser.open_new("https://aksweb.me")
-
-        self.canvas.tag_bind(self.mail, "<Button-1>", mail)
-        self.canvas.tag_bind(self.mail, "<Enter>", lambda e: self.canvas.config(cursor="hand2"))
-        self.canvas.tag_bind(self.mail, "<Leave>", lambda e: self.canvas.config(cursor=""))
+        # Contact links at the bottom of every screen
+        self.add_footer()
 
-        self.canvas.tag_bind(self.web_link, "<Button-1>", open_link)
-        self.canvas.tag_bind(self.web_link, "<Enter>", lambda e: self.canvas.config(cursor="hand2"))
-        self.canvas.tag_bind(self.web_link, "<Leave>", lambda e: self.canvas.config(cursor=""))
+    def reset(self, cost):
+        self.cost = cost
+        self.waiting = False
+        self.canvas.itemconfig(self.prompt_text, text=f"Please insert ${self.cost}")
+        # Warn up front if the cash box could not give change for dollar bills
+        warning = "Exact change only, please" if exact_change_only(self.cost) else ""
+        self.canvas.itemconfig(self.error_text, text=warning)
+        for spinbox in (self.pennies, self.nickels, self.dimes, self.quarters, self.dollars):
+            spinbox.set(0)
 
     def pay(self):
+        if self.waiting:
+            return  # This payment is already going through
+
         # 1. Get values directly from the Spinboxes
         # We use 'or 0' to handle cases where the box might be empty
         try:
@@ -308,50 +438,140 @@ class PaymentPage(ttk.Frame):
             # Safety net if they type text instead of numbers
             pennies = nickels = dimes = quarters = dollars = 0
 
-        # 2. Pass these new values to the backend
-        is_enough, change = process_payment(
-            self.cost,
-            pennies,
-            nickels,
-            dimes,
-            quarters,
-            dollars
+        coins = (pennies, nickels, dimes, quarters, dollars)
+        if any(count < 0 for count in coins):
+            # Typed-in values skip the spinbox range, so "-5" can get here
+            self.canvas.itemconfig(self.error_text, text="Coin counts cannot be negative")
+            return
+
+        # 2. Pass these new values to the backend (on the worker, see order_pipeline.py)
+        self.waiting = True
+        self.canvas.itemconfig(self.prompt_text, text="Processing payment...")
+        self.canvas.itemconfig(self.error_text, text="")
+        self.master.pipeline.submit(take_payment, self.on_paid, self.master.hold_id, self.cost, coins,
+                                    on_error=self.on_failed)
+
+    def on_failed(self, error):
+        # Let the customer try again
+        self.waiting = False
+        self.canvas.itemconfig(self.prompt_text, text=f"Please insert ${self.cost}")
+        self.canvas.itemconfig(self.error_text, text="Payment failed, please try again")
+
+    def on_paid(self, result):
+        self.waiting = False
+        status, change, change_coins = result
+
+        if status == "paid":
+            self.master.hold_id = None
+            # Brew first; the brewing screen moves on to the change or the drink
+            self.master.show_brewing_screen(change, change_coins)
+            return
+
+        self.canvas.itemconfig(self.prompt_text, text=f"Please insert ${self.cost}")
+        if status == "timed_out":
+            self.canvas.itemconfig(self.error_text, text="Order timed out, please order again")
+        elif status == "no_change":
+            self.canvas.itemconfig(self.error_text, text=f"Sorry, no change for ${change:.2f}. Try exact money")
+        else:
+            self.canvas.itemconfig(self.error_text, text=f"Not enough money! Need ${self.cost}")
+
+    def cancel(self):
+        if self.waiting:
+            return  # Too late, the payment is going through
+        # Put the held ingredients back and go back to the menu
+        hold_id, self.master.hold_id = self.master.hold_id, None
+        # If cancelling fails the hold still runs out by itself, so go back either way
+        self.master.pipeline.submit(cancel_order, lambda result: self.master.show_order_screen(), hold_id,
+                                    on_error=lambda error: self.master.show_order_screen())
+
+
+class BrewingPage(ScreenPage):
+    def __init__(self, master):
+        super().__init__(master)
+        # The background is the drink being made, so reset() swaps it in
+        self.change = 0
+        self.change_coins = None
+        self.dots = 0
+        self.station = None
+        self.failed = False
+
+        self.status_text = self.canvas.create_text(
+            270, 370,
+            text="",
+            fill="#6D1F00",
+            font=("Segoe UI", 22, "bold"),
+            justify="center"
         )
 
-        if is_enough:
-            if change == 0:
-                self.master.show_delivery_screen()
-            else:
-                # We need to pass 'change' to this screen so we can display it!
-                self.master.show_give_change_screen(change)
+        self.progress = ttk.Progressbar(self, length=300, maximum=100, bootstyle="warning-striped")
+        self.canvas.create_window(270, 430, window=self.progress)
+
+        # Contact links at the bottom of every screen
+        self.add_footer()
+
+    def reset(self, change, change_coins=None):
+        self.change = change
+        self.change_coins = change_coins
+        self.set_background(self.master.drink_image, per_visit=True)
+        self.progress.configure(value=0)
+        self.dots = 0
+        self.station = None
+        self.failed = False
+        self.animate()
+        # Started once the page is up, so a blocking pipeline (workers=0)
+        # still shows this screen before it brews
+        self.schedule(0, self.start_brew)
+
+    def start_brew(self):
+        pipeline = self.master.pipeline
+        pipeline.submit(brew_drink, self.on_brewed, self.master.drink_name, pipeline.reporter(self.on_progress),
+                        pipeline.stop, on_error=self.on_brew_failed)
+
+    def on_brew_failed(self, error):
+        if self.master.current_page is not self:
+            return
+        # The customer has paid: tell them, then free the machine for the next one
+        self.failed = True
+        self.canvas.itemconfig(self.status_text, text="Sorry, the machine could not make your drink.\n"
+                                                      "Please ask staff for help.")
+        self.schedule(BREW_ERROR_MS, self.master.show_order_screen)
+
+    def animate(self):
+        # Cancelled automatically when the page is hidden (see ScreenLifecycle)
+        if self.failed:
+            return
+        self.dots = (self.dots + 1) % 4
+        text = f"Making your {self.master.drink}" + "." * self.dots
+        if self.station is not None:
+            text += "\n" + STATION_LABELS.get(self.station, self.station.title())
+        self.canvas.itemconfig(self.status_text, text=text)
+        self.schedule(ANIMATION_MS, self.animate)
+
+    def on_progress(self, fraction, station):
+        self.progress.configure(value=fraction * 100)
+        self.station = station
+
+    def on_brewed(self, finished):
+        if not finished or self.master.current_page is not self:
+            return
+        if self.change == 0:
+            self.master.show_delivery_screen()
         else:
-            self.canvas.create_text(
-                270, 700,
-                text=f"Not enough money! Need ${self.cost}",
-                fill="red",
-                font=("Segoe UI", 12, "bold")
-            )
+            # We need to pass 'change' to this screen so we can display it!
+            self.master.show_give_change_screen(self.change, self.change_coins)
 
 
-class GiveChangePage(ttk.Frame):
-    def __init__(self, master, change):
+class GiveChangePage(ScreenPage):
+    def __init__(self, master):
         super().__init__(master)
-        self.master = master
-
-        self.canvas = ttk.Canvas(self)
-        self.canvas.pack(fill="both", expand=True)
 
-        # Load your ChangeWindow.png here
-        screen_path = os.path.join(project_root, "assets", "ChangeWindow.png")
-        pil_image = Image.open(screen_path)
-        pil_image = pil_image.resize((540, 960), Image.Resampling.LANCZOS)
-        self.photo = ImageTk.PhotoImage(pil_image)
-        self.canvas.create_image(0, 0, image=self.photo, anchor="nw")
+        # Load your ChangeWindow.png here (cached after the first visit)
+        self.set_background("ChangeWindow.png")
 
         # Show the Change Amount
-        self.canvas.create_text(
+        self.change_text = self.canvas.create_text(
             270, 450,
-            text=f"Here is your change:\n${change}",
+            text="",
             fill="#6D1F00",
             font=("Segoe UI", 20, "bold"),
             justify="center"
@@ -367,47 +587,20 @@ class GiveChangePage(ttk.Frame):
         )
         self.canvas.create_window(270, 600, window=btn_collect)
 
-        self.mail = self.canvas.create_text(
-            187, 840,
-            text="akshajgoel@bnpsramvihar.edu.in",
-            fill="#FFF3DC",
-            font=("Segoe UI", 8)
-        )
+        # Contact links at the bottom of every screen
+        self.add_footer()
 
-        self.web_link = self.canvas.create_text(
-            430, 840,
-            text="aksweb.me",
-            fill="#FFF3DC",
-            font=("Segoe UI", 8)
-        )
-
-        def mail(event):
-            webbrowser.open_new("mailto:akshajgoel@bnpsramvihar.edu.in")
+    def reset(self, change, change_coins=None):
+        text = f"Here is your change:\n${change:.2f}"
+        if change_coins:
+            text += f"\n{describe_coins(change_coins)}"
+        self.canvas.itemconfig(self.change_text, text=text)
 
-        def open_link(event):
-            webbrowser.open_new("https://aksweb.me")
 
-        self.canvas.tag_bind(self.mail, "<Button-1>", mail)
-        self.canvas.tag_bind(self.mail, "<Enter>", lambda e: self.canvas.config(cursor="hand2"))
-        self.canvas.tag_bind(self.mail, "<Leave>", lambda e: self.canvas.config(cursor=""))
-
-        self.canvas.tag_bind(self.web_link, "<Button-1>", open_link)
-        self.canvas.tag_bind(self.web_link, "<Enter>", lambda e: self.canvas.config(cursor="hand2"))
-        self.canvas.tag_bind(self.web_link, "<Leave>", lambda e: self.canvas.config(cursor=""))
-
-
-class GiveDrinkPage(ttk.Frame):
+class GiveDrinkPage(ScreenPage):
     def __init__(self, master):
         super().__init__(master)
-        self.master = master
-
-        self.canvas = ttk.Canvas(self)
-        self.canvas.pack(fill="both", expand=True)
-        screen_path = os.path.join(project_root, "assets", f"{self.master.drink}Window.png")
-        pil_image = Image.open(screen_path)
-        pil_image = pil_image.resize((540, 960), Image.Resampling.LANCZOS)
-        self.photo = ImageTk.PhotoImage(pil_image)
-        self.canvas.create_image(0, 0, image=self.photo, anchor="nw")
+        # The background depends on the drink, so reset() swaps it in
 
         self.canvas.create_text(
             280, 370,
@@ -426,31 +619,11 @@ class GiveDrinkPage(ttk.Frame):
         )
         self.canvas.create_window(270, 770, window=btn_home)
 
-        self.mail = self.canvas.create_text(
-            187, 840,
-            text="akshajgoel@bnpsramvihar.edu.in",
-            fill="#FFF3DC",
-            font=("Segoe UI", 8)
-        )
-
-        self.web_link = self.canvas.create_text(
-            430, 840,
-            text="aksweb.me",
-            fill="#FFF3DC",
-            font=("Segoe UI", 8)
-        )
-
-        def mail(event):
-            webbrowser.open_new("mailto:akshajgoel@bnpsramvihar.edu.in")
-
-        def open_link(event):
-            webbrowser.open_new("https://aksweb.me")
-
-        self.canvas.tag_bind(self.mail, "<Button-1>", mail)
-        self.canvas.tag_bind(self.mail, "<Enter>", lambda e: self.canvas.config(cursor="hand2"))
-        self.canvas.tag_bind(self.mail, "<Leave>", lambda e: self.canvas.config(cursor=""))
+        # Contact links at the bottom of every screen
+        self.add_footer()
 
-        self.canvas.tag_bind(self.web_link, "<Button-1>", open_link)
-        self.canvas.tag_bind(self.web_link, "<Enter>", lambda e: self.canvas.config(cursor="hand2"))
+    def reset(self):
+        # Served from the shared cache, so switching drinks is a lookup.
+        # Only held for this visit: on_hide() lets the cache evict it later.
+        self.set_background(self.master.drink_image, per_visit=True)
 
-        self.canvas.tag_bind(self.web_link, "<Leave>", lambda e: self.canvas.config(cursor=""))
@@ -0,0 +1,71 @@
+class ScreenLifecycle:
+    """
+    Mixin for Tk pages that are built once and shown many times.
+
+    Anything Tk keeps alive on a page's behalf (PhotoImages, canvas tag
+    bindings, after() timers) is registered through these helpers, so it
+    can be released deterministically instead of piling up:
+
+      on_hide()  -> drops what belongs to the current visit
+                    (per-visit images, pending timers)
+      release()  -> drops everything (called from destroy())
+    """
+
+    def init_lifecycle(self):
+        self._images = {}        # name -> PhotoImage kept for the page's lifetime
+        self._visit_images = {}  # name -> PhotoImage kept only while shown
+        self._bindings = []      # (widget, tag, sequence, funcid)
+        self._afters = set()     # pending after() ids
+
+    def keep_image(self, name, photo, per_visit=False):
+        """Keeps a reference so Tk does not lose the image while it is drawn."""
+        self._images.pop(name, None)
+        self._visit_images.pop(name, None)
+        if per_visit:
+            self._visit_images[name] = photo
+        else:
+            self._images[name] = photo
+
+    def bind_item(self, canvas, item, sequence, callback):
+        """canvas.tag_bind that can be undone (which also frees its Tcl command)."""
+        funcid = canvas.tag_bind(item, sequence, callback, add="+")
+        self._bindings.append((canvas, item, sequence, funcid))
+        return funcid
+
+    def schedule(self, ms, callback, *args):
+        """self.after() that is cancelled automatically when the page is hidden."""
+        def run():
+            self._afters.discard(after_id)
+            callback(*args)
+
+        after_id = self.after(ms, run)
+        self._afters.add(after_id)
+        return after_id
+
+    def cancel_scheduled(self):
+        for after_id in self._afters:
+            self.after_cancel(after_id)
+        self._afters.clear()
+
+    def on_hide(self):
+        self.cancel_scheduled()
+        self._visit_images.clear()
+
+    def release(self):
+        self.on_hide()
+        for canvas, item, sequence, funcid in self._bindings:
+            canvas.tag_unbind(item, sequence, funcid)
+        self._bindings.clear()
+        self._images.clear()
+
+    def lifecycle_counts(self):
+        """How many resources this page currently holds (for MemoryProbe)."""
+        return {
+            "images": len(self._images) + len(self._visit_images),
+            "bindings": len(self._bindings),
+            "timers": len(self._afters),
+        }
+
+    def destroy(self):
+        self.release()
+        super().destroy()
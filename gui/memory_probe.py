@@ -0,0 +1,102 @@
+import gc
+import json
+import os
+import time
+import tkinter
+import tracemalloc
+
+current_script_path = os.path.abspath(__file__)
+gui_folder_path = os.path.dirname(current_script_path)
+project_root = os.path.dirname(gui_folder_path)
+default_report_dir = os.path.join(project_root, "memory_reports")
+
+
+def rss_kb():
+    """Resident set size in KB (Linux), else peak RSS, else None."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        return None
+
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+class MemoryProbe:
+    """
+    Live memory numbers for a running CoffeeApp, to check that a kiosk
+    stays flat over weeks of orders.
+
+    sample() is cheap (counts only). snapshot_diff() needs tracing on and
+    lists the source lines whose allocations grew since the last call.
+    dump() writes both to a JSON file.
+    """
+
+    def __init__(self, app, trace=False, frames=10):
+        self.app = app
+        self._last_snapshot = None
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def sample(self):
+        app = self.app
+        photo_objects = sum(1 for obj in gc.get_objects() if isinstance(obj, tkinter.PhotoImage))
+        pages = {type(page).__name__: page.lifecycle_counts() for page in app.frames.values()}
+        sample = {
+            "time": time.time(),
+            "rss_kb": rss_kb(),
+            "widgets": count_widgets(app),
+            "tk_images": len(app.image_names()),
+            "photoimage_objects": photo_objects,
+            # Every Python callback handed to Tk is a Tcl command; leaks show up here
+            "tcl_commands": len(app.tk.call("info", "commands")),
+            "after_callbacks": len(app.tk.call("after", "info")),
+            "canvas_items": sum(len(page.canvas.find_all()) for page in app.frames.values()),
+            "asset_cache_bytes": app.assets.current_bytes,
+            "pages": pages,
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            sample["traced_bytes"] = current
+            sample["traced_peak_bytes"] = peak
+        return sample
+
+    def snapshot_diff(self, limit=15):
+        """Top allocation growth (by source line) since the previous call."""
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ])
+        previous, self._last_snapshot = self._last_snapshot, snapshot
+        if previous is None:
+            return []
+
+        growth = []
+        for stat in snapshot.compare_to(previous, "lineno")[:limit]:
+            frame = stat.traceback[0]
+            growth.append({
+                "where": f"{frame.filename}:{frame.lineno}",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+            })
+        return growth
+
+    def dump(self, path=None):
+        if path is None:
+            os.makedirs(default_report_dir, exist_ok=True)
+            path = os.path.join(default_report_dir, time.strftime("memory-%Y%m%d-%H%M%S.json"))
+        report = {"sample": self.sample(), "allocation_growth": self.snapshot_diff()}
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Memory report written to {path}")
+        return path
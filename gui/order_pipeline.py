@@ -0,0 +1,136 @@
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import pay_order
+
+# How often (ms) the Tk thread picks up finished work while jobs are running
+POLL_MS = 15
+
+
+class OrderPipeline:
+    """
+    Runs the slow parts of an order (payment, brewing) on a worker thread
+    so Tk keeps drawing and answering clicks meanwhile.
+
+    Tk may only be touched from its own thread, so workers never call the
+    GUI: finished results and progress updates go into a queue, and the
+    Tk thread drains it with after() every POLL_MS while work is pending.
+
+        pipeline.submit(take_payment, page.on_paid, hold_id, cost, coins)
+
+    workers=0 runs every job right away on the calling thread (the old,
+    blocking behaviour), which is handy for scripts and comparisons.
+
+    A callback that raises is reported through Tk's
+    report_callback_exception and does not stop the others.
+    """
+
+    def __init__(self, root, workers=1, poll_ms=POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        # One worker keeps the steps of an order in the order they were asked for
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="order") if workers else None
+        self.stop = threading.Event()
+
+        self._results = queue.SimpleQueue()  # (callback, args, finished)
+        self._poll_after = None
+        self.pending = 0
+
+    def submit(self, work, on_done, *args, on_error=None):
+        """
+        Runs work(*args) on the worker, then on_done(result) on the Tk
+        thread. If work raises, on_error(error) is called instead (so the
+        page can stop waiting) and the error is reported.
+        """
+        if self.executor is None:
+            try:
+                result = work(*args)
+            except Exception as error:
+                self._fail(error, on_error)
+            if on_done is not None:
+                on_done(result)
+            return
+
+        self.pending += 1
+        self.executor.submit(self._run, work, on_done, args, on_error)
+        if self._poll_after is None:
+            self._poll_after = self.root.after(self.poll_ms, self.poll)
+
+    def _run(self, work, on_done, args, on_error):
+        try:
+            result = work(*args)
+        except Exception as error:
+            # Raised again on the Tk thread, so Tk reports it like any callback error
+            self._results.put((self._fail, (error, on_error), True))
+        else:
+            self._results.put((on_done, (result,), True))
+
+    @staticmethod
+    def _fail(error, on_error):
+        if on_error is not None:
+            on_error(error)
+        raise error
+
+    def reporter(self, callback):
+        """
+        A function the worker can call with progress values; callback
+        gets them on the Tk thread. Only the newest value per poll is
+        shown, older ones are skipped.
+        """
+        if self.executor is None:
+            return callback
+        return lambda *args: self._results.put((callback, args, False))
+
+    def poll(self):
+        self._poll_after = None
+        latest = {}
+        finished = []
+        try:
+            while True:
+                try:
+                    callback, args, done = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                if done:
+                    finished.append((callback, args))
+                else:
+                    latest[callback] = args
+
+            for callback, args in latest.items():
+                self._call(callback, args)
+            for callback, args in finished:
+                self.pending -= 1
+                if callback is not None:
+                    self._call(callback, args)
+        finally:
+            # Keep polling even if something above went wrong
+            if self.pending > 0 and self._poll_after is None:
+                self._poll_after = self.root.after(self.poll_ms, self.poll)
+
+    def _call(self, callback, args):
+        # One failing callback must not lose the results queued behind it
+        try:
+            callback(*args)
+        except Exception:
+            self.root.report_callback_exception(*sys.exc_info())
+
+    def close(self):
+        """Stops brewing, waits for the worker and drops results nobody will show."""
+        self.stop.set()
+        if self._poll_after is not None:
+            self.root.after_cancel(self._poll_after)
+            self._poll_after = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        self.pending = 0
+
+
+# --- STAGES (run on the worker thread, must not touch Tk) ---
+def take_payment(hold_id, cost, coins):
+    """
+    Pays for a held drink. Returns (status, change, change_coins) with
+    status "paid", "timed_out", "no_change" or "short".
+    """
+    return pay_order(hold_id, cost, coins)
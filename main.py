@@ -1,4 +1,137 @@
-from gui import CoffeeApp
+import argparse
+import os
+import sys
+from contextlib import nullcontext
+
+# The kiosk brews this much faster than real hardware (a latte takes
+# about 8 s instead of 85 s) unless --brew-time-scale or the config's
+# "hardware": {"time_scale": ...} says otherwise
+DEMO_BREW_TIME_SCALE = 0.1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Coffee Machine")
+    parser.add_argument("--profile-startup", action="store_true",
+                        default=os.environ.get("COFFEE_PROFILE_STARTUP") == "1",
+                        help="time each startup step, print a report and quit after the first paint")
+    parser.add_argument("--startup-report", metavar="PATH",
+                        help="also write the startup report as JSON to PATH")
+    parser.add_argument("--config", metavar="PATH", default=os.environ.get("COFFEE_CONFIG"),
+                        help="machine config (JSON) with tank capacities and low-stock thresholds")
+    parser.add_argument("--menu", metavar="PATH", default=os.environ.get("COFFEE_MENU"),
+                        help="menu file (JSON) to use instead of the built-in menu")
+    parser.add_argument("--shared", metavar="NAME", default=os.environ.get("COFFEE_SHARED"),
+                        help="keep stock and coins in the shared-memory state NAME, shared with other processes")
+    parser.add_argument("--journal", metavar="PATH", default=os.environ.get("COFFEE_JOURNAL"),
+                        help="restore the machine from this transaction journal and keep logging to it")
+    parser.add_argument("--brew-time-scale", metavar="SCALE", type=float,
+                        default=os.environ.get("COFFEE_BREW_TIME_SCALE"),
+                        help=f"speed of the simulated brewing, 1 = real time (default: {DEMO_BREW_TIME_SCALE}, "
+                             "or the config's hardware.time_scale)")
+    parser.add_argument("--startup-budget", metavar="[PHASE=]MS", action="append", default=[],
+                        help="fail (exit code 1) if startup or a phase takes longer than MS milliseconds")
+    args = parser.parse_args(argv)
+    if args.shared and args.journal:
+        # Recovery would overwrite the stock the other processes are using
+        parser.error("--journal cannot be used together with --shared")
+    if args.brew_time_scale is not None and args.brew_time_scale < 0:
+        parser.error("--brew-time-scale must be >= 0")
+    return args
+
+
+def set_brew_speed(args):
+    """Applies --brew-time-scale, or the demo speed if neither it nor the config sets one."""
+    from backend import machine
+    from backend.hardware import TIME_SCALE_KEY
+
+    if args.brew_time_scale is not None:
+        machine.hardware.time_scale = args.brew_time_scale
+    elif TIME_SCALE_KEY not in machine.config.get("hardware", {}):
+        machine.hardware.time_scale = DEMO_BREW_TIME_SCALE
+
+
+def setup_machine(args, profiler=None):
+    """
+    Applies --config, --menu, --brew-time-scale, --shared and --journal to
+    the default machine, each timed as its own phase when profiling.
+    Returns (shared state, journal), either may be None; close them on exit.
+    """
+    def phase(name):
+        return profiler.phase(name) if profiler is not None else nullcontext()
+
+    if args.config:
+        from backend import configure_machine
+        with phase("load config"):
+            configure_machine(args.config)
+    if args.menu:
+        from backend import configure_menu
+        with phase("load menu"):
+            configure_menu(args.menu)
+    set_brew_speed(args)
+
+    shared = None
+    if args.shared:
+        from backend import attach_shared_state
+        with phase("attach shared state"):
+            shared = attach_shared_state(args.shared)
+
+    journal = None
+    if args.journal:
+        from backend import enable_journal
+        # Loads the snapshot and replays the journal tail
+        with phase("recover journal"):
+            journal = enable_journal(args.journal)
+    return shared, journal
+
+
+def close_machine(shared, journal):
+    if journal is not None:
+        journal.close()
+    if shared is not None:
+        shared.close()
+
+
+def profile_startup(args):
+    from startup_profiler import StartupProfiler, parse_budget
+
+    profiler = StartupProfiler()
+    profiler.time_imports()
+
+    # The same setup a normal start does, so the report covers it too
+    shared, journal = setup_machine(args, profiler)
+    try:
+        from gui import CoffeeApp
+        app = CoffeeApp(profiler=profiler, run_mainloop=False)
+        app.destroy()
+    finally:
+        close_machine(shared, journal)
+
+    budget = parse_budget(args.startup_budget) if args.startup_budget else None
+    report = profiler.report(budget)
+
+    for phase in report["phases"]:
+        print(f"{phase['start_ms']:9.1f} ms  {phase['duration_ms']:8.1f} ms  {phase['name']}")
+    print(f"Total: {report['total_ms']:.1f} ms")
+
+    if args.startup_report:
+        profiler.write_report(args.startup_report, budget)
+
+    if budget is not None and not report["budget"]["passed"]:
+        for overrun in report["budget"]["overruns"]:
+            print(f"OVER BUDGET: {overrun['name']} took {overrun['measured_ms']} ms "
+                  f"(allowed {overrun['allowed_ms']} ms)")
+        return 1
+    return 0
+
 
 if __name__ == "__main__":
-    app = CoffeeApp()
+    args = parse_args()
+    if args.profile_startup:
+        sys.exit(profile_startup(args))
+
+    shared, journal = setup_machine(args)
+    from gui import CoffeeApp
+    try:
+        app = CoffeeApp()
+    finally:
+        close_machine(shared, journal)
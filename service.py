@@ -0,0 +1,318 @@
+"""
+Headless order service: the same backend the GUI uses, served over a
+local socket so many clients can order at once (and so it can be load
+tested without a display).
+
+Protocol: one JSON object per line, one JSON reply per line.
+
+    {"op": "menu"}
+    {"op": "order", "drink": "latte"}                      -> {"ok": true, "hold_id": 1, "cost": 2.5}
+    {"op": "pay", "hold_id": 1, "coins": {"quarters": 10}} -> {"ok": true, "change": 0.0, "change_coins": {...},
+                                                               "ticket": 7}
+                                                           (optional "priority": "high", "source": "app-42")
+    {"op": "ticket", "ticket": 7}                          -> {"ok": true, "status": {"state": "queued", "ahead": 2, ...}}
+    {"op": "queue"}                                        -> queue depth, waits and batch sizes
+    {"op": "cancel", "hold_id": 1}
+    {"op": "refill"}                                       (optional "ingredients": ["milk"])
+    {"op": "top_up", "amounts": {"milk": 500}}
+    {"op": "inventory"}
+    {"op": "stats"}                                        -> sales summary (see backend/analytics.py)
+
+Run:  python service.py --port 8765
+"""
+import argparse
+import asyncio
+import json
+
+from backend import (machine, pay_order, reserve_drink, hold_active, cancel_order,
+                     release_expired_holds, available_drinks, configure_machine, configure_menu, attach_shared_state,
+                     enable_journal, enable_analytics, enable_refill_scheduler, enable_order_queue)
+from backend.money import COIN_NAMES, MAX_COIN_COUNT, coins_value, to_cents
+from backend.order_queue import PRIORITIES, DEFAULT_PRIORITY
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# How often (seconds) abandoned payments are released
+SWEEP_INTERVAL = 5
+
+# A payment may be at most this much (cents) over the price: a stack of
+# bills, not a number big enough to keep the change search busy
+MAX_OVERPAY = 100 * 100
+
+# Fields that must be JSON objects / lists when they are sent
+FIELD_TYPES = {"coins": (dict, "an object"), "amounts": (dict, "an object"), "ingredients": (list, "a list")}
+
+
+class OrderService:
+    """
+    Turns protocol messages into backend calls.
+
+    Backend calls only hold a lock for a few dict updates, so they run
+    directly on the event loop; that is cheaper than a thread hop and
+    still lets thousands of clients wait on their sockets concurrently.
+    """
+
+    def __init__(self, coffee_machine=None, analytics=None, order_queue=None):
+        self.machine = coffee_machine or machine
+        self.analytics = analytics
+        # Paid drinks wait here for the hardware (see backend/order_queue.py)
+        self.order_queue = order_queue
+        # hold_id -> drink name, so 'pay' knows what is being paid for
+        self.orders = {}
+        self.handlers = {
+            "menu": self.menu,
+            "order": self.order,
+            "pay": self.pay,
+            "cancel": self.cancel,
+            "refill": self.refill,
+            "top_up": self.top_up,
+            "inventory": self.inventory,
+            "stats": self.stats,
+            "ticket": self.ticket,
+            "queue": self.queue,
+        }
+
+    def handle(self, message):
+        if not isinstance(message, dict):
+            return {"ok": False, "error": "Bad request: expected a JSON object"}
+        op = message.get("op")
+        handler = self.handlers.get(op) if isinstance(op, str) else None
+        if handler is None:
+            return {"ok": False, "error": f"Unknown op: {op!r}"}
+        for field, (kind, described) in FIELD_TYPES.items():
+            if field in message and not isinstance(message[field], kind):
+                return {"ok": False, "error": f"Bad request: {field} must be {described}"}
+        try:
+            return handler(message)
+        except (KeyError, TypeError, ValueError) as e:
+            return {"ok": False, "error": f"Bad request: {e}"}
+
+    def price(self, drink):
+        """Price of a drink in dollars."""
+        menu = self.machine.menu
+        return menu.prices[menu.ids[drink]] / 100
+
+    def menu(self, message):
+        menu = self.machine.menu
+        prices = {name: price / 100 for name, price in zip(menu.names, menu.prices)}
+        return {"ok": True, "menu": prices, "available": available_drinks(self.machine)}
+
+    def order(self, message):
+        drink = message["drink"]
+        if drink not in self.machine.menu.ids:
+            return {"ok": False, "error": f"Unknown drink: {drink}"}
+
+        try:
+            # HoldBook checks the ttl before reserving anything
+            hold_id, missing_item = reserve_drink(drink, message.get("ttl"), self.machine)
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}
+        if hold_id is None:
+            return {"ok": False, "error": f"Not enough {missing_item}", "missing": missing_item}
+
+        self.orders[hold_id] = drink
+        return {"ok": True, "hold_id": hold_id, "cost": self.price(drink)}
+
+    def pay(self, message):
+        hold_id = message["hold_id"]
+        drink = self.orders.get(hold_id)
+        if drink is None or not hold_active(hold_id, self.machine):
+            self.orders.pop(hold_id, None)
+            return {"ok": False, "error": "Order timed out or does not exist"}
+        priority = message.get("priority", DEFAULT_PRIORITY)
+        if priority not in PRIORITIES:
+            return {"ok": False, "error": f"Unknown priority: {priority!r}"}
+
+        coins = [int(message.get("coins", {}).get(name, 0)) for name in COIN_NAMES]
+        if any(count < 0 for count in coins):
+            return {"ok": False, "error": "Coin counts must not be negative"}
+        if any(count > MAX_COIN_COUNT for count in coins):
+            return {"ok": False, "error": f"At most {MAX_COIN_COUNT} coins of each kind"}
+        if coins_value(coins) > to_cents(self.price(drink)) + MAX_OVERPAY:
+            return {"ok": False, "error": f"Too much money: at most ${MAX_OVERPAY // 100} over the price"}
+        status, change, change_coins = pay_order(hold_id, self.price(drink), coins, self.machine)
+        if status == "timed_out":
+            self.orders.pop(hold_id, None)
+            return {"ok": False, "error": "Order timed out or does not exist"}
+        if status == "short":
+            return {"ok": False, "error": "Not enough money"}
+        if status == "no_change":
+            return {"ok": False, "error": f"Cannot give change of ${change:.2f}"}
+
+        del self.orders[hold_id]
+        reply = {"ok": True, "drink": drink, "change": change,
+                 "change_coins": dict(zip(COIN_NAMES, change_coins))}
+        if self.order_queue is not None:
+            source = message.get("source")
+            reply["ticket"] = self.order_queue.submit(drink, priority, None if source is None else str(source))
+        return reply
+
+    def cancel(self, message):
+        hold_id = message["hold_id"]
+        self.orders.pop(hold_id, None)
+        return {"ok": cancel_order(hold_id, self.machine)}
+
+    def refill(self, message):
+        items = message.get("ingredients")
+        unknown = set(items or ()) - set(self.machine.inventory.capacity)
+        if unknown:
+            return {"ok": False, "error": f"Unknown ingredient: {', '.join(sorted(unknown))}"}
+        self.machine.refill(items)
+        return {"ok": True, "resources": self.machine.resources}
+
+    def top_up(self, message):
+        amounts = {item: int(amount) for item, amount in message["amounts"].items()}
+        unknown = set(amounts) - set(self.machine.inventory.capacity)
+        if unknown:
+            return {"ok": False, "error": f"Unknown ingredient: {', '.join(sorted(unknown))}"}
+        try:
+            self.machine.top_up(amounts)
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}
+        return {"ok": True, "resources": self.machine.resources}
+
+    def inventory(self, message):
+        return {
+            "ok": True,
+            "resources": self.machine.resources,
+            "cash": self.machine.cash_box.as_dict(),
+            "open_orders": len(self.machine.holds),
+        }
+
+    def stats(self, message):
+        if self.analytics is None:
+            return {"ok": False, "error": "Analytics are not enabled"}
+        return {"ok": True, "stats": self.analytics.summary()}
+
+    def ticket(self, message):
+        if self.order_queue is None:
+            return {"ok": False, "error": "The order queue is not enabled"}
+        status = self.order_queue.status(int(message["ticket"]))
+        if status is None:
+            return {"ok": False, "error": "Unknown ticket"}
+        return {"ok": True, "status": status}
+
+    def queue(self, message):
+        if self.order_queue is None:
+            return {"ok": False, "error": "The order queue is not enabled"}
+        return {"ok": True, "queue": self.order_queue.stats()}
+
+    async def serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = self.handle(json.loads(line))
+                except json.JSONDecodeError:
+                    reply = {"ok": False, "error": "Invalid JSON"}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def cancel_open_orders(self):
+        """Gives back the stock of every order that was never paid (on shutdown)."""
+        for hold_id in list(self.orders):
+            cancel_order(hold_id, self.machine)
+        self.orders.clear()
+
+    async def sweep_forever(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            release_expired_holds(self.machine)
+            # Forget orders whose holds are gone
+            for hold_id in [h for h in self.orders if h not in self.machine.holds]:
+                del self.orders[hold_id]
+
+
+def report_stock_warnings(event_type, data):
+    """Tells the operator (on the console) that a refill will be needed soon."""
+    if event_type == "refill_due":
+        print(f"Refill soon: {data['ingredient']} runs out in about {data['seconds_left'] / 60:.0f} min "
+              f"({data['level']} left, {data['per_minute']}/min)")
+    elif event_type == "low_stock":
+        print(f"Low stock: {data['ingredient']} is at {data['level']} (threshold {data['threshold']})")
+
+
+class ServiceClient:
+    """Minimal async client, handy for scripts and load tests."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, op, **fields):
+        self.writer.write(json.dumps({"op": op, **fields}).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def run_server(host=DEFAULT_HOST, port=DEFAULT_PORT, service=None):
+    service = service or OrderService()
+    server = await asyncio.start_server(service.serve_client, host, port)
+    sweeper = asyncio.create_task(service.sweep_forever())
+    print(f"Coffee service listening on {host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        sweeper.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Coffee Machine order service")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="interface to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--config", metavar="PATH",
+                        help="machine config (JSON) with tank capacities and low-stock thresholds")
+    parser.add_argument("--menu", metavar="PATH", help="menu file (JSON) to use instead of the built-in menu")
+    parser.add_argument("--shared", metavar="NAME",
+                        help="keep stock and coins in the shared-memory state NAME, shared with other processes")
+    parser.add_argument("--journal", metavar="PATH",
+                        help="restore the machine from this transaction journal and keep logging to it")
+    args = parser.parse_args()
+    if args.shared and args.journal:
+        # Recovery would overwrite the stock the other processes are using
+        parser.error("--journal cannot be used together with --shared")
+
+    if args.config:
+        configure_machine(args.config)
+    if args.menu:
+        configure_menu(args.menu)
+    shared = attach_shared_state(args.shared) if args.shared else None
+    journal = enable_journal(args.journal) if args.journal else None
+    barista = enable_order_queue()
+    service = OrderService(analytics=enable_analytics(), order_queue=barista.queue)
+    machine.subscribe(report_stock_warnings)
+    scheduler = enable_refill_scheduler()
+    try:
+        asyncio.run(run_server(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+        barista.stop()
+        service.cancel_open_orders()
+        if journal is not None:
+            journal.close()
+        if shared is not None:
+            shared.close()
+
+
+if __name__ == "__main__":
+    main()
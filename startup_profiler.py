@@ -0,0 +1,115 @@
+import importlib
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+# Imports main.py pays for before the first screen, timed one by one.
+# Order matters: later entries reuse whatever the earlier ones loaded.
+STARTUP_IMPORTS = ["ttkbootstrap", "PIL.Image", "backend", "gui"]
+
+# Modules that should NOT be loaded before the first paint (lazy imports).
+# PIL.ImageTk is not listed: ttkbootstrap imports it itself.
+LAZY_MODULES = ["webbrowser"]
+
+
+class StartupProfiler:
+    """
+    Records wall time for every step of a cold start (imports, theme
+    creation, icon, first screen, first paint) and checks the result
+    against a time budget.
+
+    Usage:
+        profiler = StartupProfiler()
+        with profiler.phase("import gui"):
+            import gui
+        print(profiler.report())
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # (name, start_ms, duration_ms)
+        self.lazy_loaded = {}
+
+    def now_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    @contextmanager
+    def phase(self, name):
+        start = self.now_ms()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start, self.now_ms() - start))
+
+    def time_imports(self, modules=STARTUP_IMPORTS):
+        for module in modules:
+            with self.phase(f"import {module}"):
+                importlib.import_module(module)
+
+    def check_lazy_modules(self, modules=LAZY_MODULES):
+        """Remembers which 'lazy' modules were already imported at this point."""
+        self.lazy_loaded = {module: module in sys.modules for module in modules}
+
+    def total_ms(self):
+        if not self.phases:
+            return 0.0
+        return max(start + duration for _, start, duration in self.phases)
+
+    def phase_ms(self, name):
+        total = 0.0
+        for phase_name, _, duration in self.phases:
+            if phase_name == name:
+                total += duration
+        return total
+
+    def check_budget(self, budget):
+        """
+        budget maps a phase name (or 'total') to the allowed milliseconds.
+        Returns a list of (name, measured_ms, allowed_ms) for every overrun.
+        """
+        overruns = []
+        for name, allowed in budget.items():
+            measured = self.total_ms() if name == "total" else self.phase_ms(name)
+            if measured > allowed:
+                overruns.append((name, measured, allowed))
+        return overruns
+
+    def report(self, budget=None):
+        report = {
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "total_ms": round(self.total_ms(), 2),
+            "phases": [
+                {"name": name, "start_ms": round(start, 2), "duration_ms": round(duration, 2)}
+                for name, start, duration in self.phases
+            ],
+            "lazy_modules_loaded": self.lazy_loaded,
+        }
+        if budget is not None:
+            overruns = self.check_budget(budget)
+            report["budget"] = {
+                "limits_ms": budget,
+                "overruns": [
+                    {"name": name, "measured_ms": round(measured, 2), "allowed_ms": allowed}
+                    for name, measured, allowed in overruns
+                ],
+                "passed": not overruns,
+            }
+        return report
+
+    def write_report(self, path, budget=None):
+        with open(path, "w") as f:
+            json.dump(self.report(budget), f, indent=2)
+
+
+def parse_budget(values):
+    """
+    Turns ["800", "import gui=300"] into {"total": 800.0, "import gui": 300.0}.
+    A bare number is a budget for the whole startup.
+    """
+    budget = {}
+    for value in values:
+        name, _, limit = value.rpartition("=")
+        budget[name.strip() or "total"] = float(limit)
+    return budget